@@ -0,0 +1,53 @@
+"""Compare scalar and batched colour conversions at several batch sizes."""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+import numpy as np
+
+from rsi import colour_space
+from rsi.colour import rgb_to_hsv
+
+COUNTS = (1, 100, 10_000)
+
+
+def main() -> None:
+    """Run the benchmark and print microseconds per batch."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200, help="batches timed per case")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    correction = colour_space.ColourCorrection(gamma=2.2, white_balance=(1.0, 0.9, 0.8), max_brightness=0.8)
+    print(
+        f"{'colours':>8} {'scalar hsv':>11} {'batch hsv':>10} {'hsv->rgb':>9} "
+        f"{'rgb->lab':>9} {'linear':>8} {'correct':>8}  (us per batch)",
+    )
+    for count in COUNTS:
+        colours = rng.integers(0, 256, (count, 3), dtype=np.uint8)
+        hsv = colour_space.rgb_to_hsv(colours)
+        rows = colours.tolist()
+        cases = {
+            'scalar hsv': lambda: [rgb_to_hsv(*row) for row in rows],  # noqa: B023
+            'batch hsv': lambda: colour_space.rgb_to_hsv(colours),  # noqa: B023
+            'hsv->rgb': lambda: colour_space.hsv_to_rgb(hsv),  # noqa: B023
+            'rgb->lab': lambda: colour_space.rgb_to_lab(colours),  # noqa: B023
+            'linear': lambda: colour_space.srgb_to_linear(colours),  # noqa: B023
+            'correct': lambda: correction.apply(colours),  # noqa: B023
+        }
+        # The scalar loop is slow at large batches, so time it fewer times
+        timings = {
+            name: timeit.timeit(case, number=max(1, args.repeat // (count // 100 + 1))) * 1e6
+            / max(1, args.repeat // (count // 100 + 1))
+            for name, case in cases.items()
+        }
+        print(
+            f"{count:>8} {timings['scalar hsv']:>11.1f} {timings['batch hsv']:>10.1f} {timings['hsv->rgb']:>9.1f} "
+            f"{timings['rgb->lab']:>9.1f} {timings['linear']:>8.1f} {timings['correct']:>8.1f}",
+        )
+
+
+if __name__ == '__main__':
+    main()
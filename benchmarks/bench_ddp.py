@@ -0,0 +1,105 @@
+"""Measure DDP throughput against a local stand-in receiver."""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from rsi.light_wled import DDPLightChanger
+from rsi.packets import DDP_HEADER_SIZE
+
+PUSH_FLAG = 0x01
+LED_COUNTS = (256, 1024, 4096, 16384)
+
+
+class StubReceiver:
+    """Count DDP packets and the frames they complete, like a pixel controller would."""
+
+    def __init__(self) -> None:
+        """Bind to a free local port."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.2)
+        self.packets = 0
+        self.bytes = 0
+        self.frames = 0
+        self.incomplete = 0
+        self._received = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The address the receiver listens on."""
+        return self.sock.getsockname()
+
+    def start(self) -> None:
+        """Start receiving."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop receiving and close the socket."""
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                packet = self.sock.recv(2048)
+            except socket.timeout:
+                continue
+            flags, _, _, _, offset, length = struct.unpack_from('>BBBBIH', packet)
+            self.packets += 1
+            self.bytes += len(packet)
+            self._received += len(packet) - DDP_HEADER_SIZE
+            if flags & PUSH_FLAG:
+                # A frame is complete when the pushed data covers every byte up to its end
+                if self._received == offset + length:
+                    self.frames += 1
+                else:
+                    self.incomplete += 1
+                self._received = 0
+
+
+def main() -> None:
+    """Send frames of several sizes and print what the receiver saw."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=500, help="frames sent per LED count")
+    parser.add_argument('--fps', type=float, default=0, help="send rate; 0 sends as fast as possible")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'leds':>6} {'packets':>8} {'frames':>7} {'incomplete':>10} {'send ms':>8} {'MB/s':>7}")
+    for led_count in LED_COUNTS:
+        receiver = StubReceiver()
+        receiver.start()
+        ip, port = receiver.address
+        light_changer = DDPLightChanger(ip, led_count, port)
+        colours = rng.integers(0, 256, (led_count, 3), dtype=np.uint8)
+        period = 1 / args.fps if args.fps else 0.0
+
+        start = time.perf_counter()
+        for frame in range(args.frames):
+            light_changer.change_colours(colours)
+            if period:
+                time.sleep(max(0.0, start + (frame + 1) * period - time.perf_counter()))
+        elapsed = time.perf_counter() - start
+        time.sleep(0.3)
+        receiver.stop()
+        light_changer.sock.close()
+
+        print(
+            f"{led_count:>6} {receiver.packets:>8} {receiver.frames:>7} {receiver.incomplete:>10} "
+            f"{elapsed / args.frames * 1000:>8.3f} {receiver.bytes / elapsed / 1e6:>7.1f}",
+        )
+
+
+if __name__ == '__main__':
+    main()
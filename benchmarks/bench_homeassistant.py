@@ -0,0 +1,166 @@
+"""Compare the Home Assistant webhook and WebSocket light changers against local stand-in servers."""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import http.server
+import json
+import socketserver
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import websocket
+
+from rsi.light_homeassistant import HALightChanger
+from rsi.light_homeassistant_ws import HAWebSocketLightChanger
+
+if TYPE_CHECKING:
+    from rsi.types import LightChanger
+
+
+class StubWebhookHandler(http.server.BaseHTTPRequestHandler):
+    """Answer every webhook POST after a fixed delay, like a busy Home Assistant."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like Home Assistant
+    delay = 0.0
+    received = 0
+    lock = threading.Lock()
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Handle a webhook call."""
+        time.sleep(self.delay)
+        with self.lock:
+            type(self).received += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args: Any) -> None:  # noqa: ANN401
+        """Keep the benchmark output clean."""
+
+
+def serve_stub(delay: float) -> http.server.ThreadingHTTPServer:
+    """Start a stub webhook server on a free local port."""
+    StubWebhookHandler.delay = delay
+    StubWebhookHandler.received = 0
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubWebhookHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+_WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class StubWebSocketHandler(socketserver.BaseRequestHandler):
+    """Speak just enough of the Home Assistant WebSocket API to answer service calls."""
+
+    delay = 0.0
+    received = 0
+
+    def _send(self, message: dict[str, Any]) -> None:
+        # Servers send unmasked frames
+        frame = websocket.ABNF(1, 0, 0, 0, websocket.ABNF.OPCODE_TEXT, 0, json.dumps(message).encode())
+        self.request.sendall(frame.format())
+
+    def _recv(self, size: int) -> bytes:
+        data = self.request.recv(size)
+        if not data:
+            raise ConnectionResetError
+        return data
+
+    def handle(self) -> None:
+        """Upgrade the connection, authenticate and answer calls in order."""
+        request = b''
+        while b'\r\n\r\n' not in request:
+            request += self.request.recv(4096)
+        key = next(
+            line.split(b':', 1)[1].strip()
+            for line in request.split(b'\r\n')
+            if line.lower().startswith(b'sec-websocket-key:')
+        )
+        accept = base64.b64encode(hashlib.sha1(key + _WEBSOCKET_GUID, usedforsecurity=False).digest())
+        self.request.sendall(
+            b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n',
+        )
+
+        # The client waits for the greeting, so nothing follows the handshake yet
+        frames = websocket.frame_buffer(self._recv, skip_utf8_validation=True)
+        self._send({'type': 'auth_required'})
+        try:
+            frames.recv_frame()
+            self._send({'type': 'auth_ok'})
+            while True:
+                frame = frames.recv_frame()
+                if frame.opcode == websocket.ABNF.OPCODE_CLOSE:
+                    return
+                message = json.loads(frame.data)
+                time.sleep(self.delay)
+                type(self).received += 1
+                self._send({'id': message['id'], 'type': 'result', 'success': True, 'result': None})
+        except (websocket.WebSocketException, ConnectionError):
+            return
+
+
+def serve_websocket_stub(delay: float) -> socketserver.ThreadingTCPServer:
+    """Start a stub Home Assistant WebSocket server on a free local port."""
+    StubWebSocketHandler.delay = delay
+    StubWebSocketHandler.received = 0
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubWebSocketHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(transport: str, args: argparse.Namespace) -> None:
+    """Offer colours at a steady rate over one transport and print throughput and latency."""
+    changer: LightChanger
+    if transport == 'webhook':
+        server: socketserver.TCPServer = serve_stub(args.delay)
+        host, port = server.server_address[:2]
+        changer = HALightChanger(str(host), port, max_in_flight=args.in_flight)
+        handler: Any = StubWebhookHandler
+    else:
+        server = serve_websocket_stub(args.delay)
+        host, port = server.server_address[:2]
+        changer = HAWebSocketLightChanger(str(host), port, 'token', 'light.stub', max_in_flight=args.in_flight)
+        handler = StubWebSocketHandler
+
+    offered = 0
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        changer.change_colour(offered % 256, 128, 255 - offered % 256)
+        offered += 1
+        time.sleep(1 / args.fps)
+    changer.default_colour()
+    changer.close()  # type: ignore[attr-defined]
+    server.shutdown()
+
+    summary = changer.latency.summary()  # type: ignore[attr-defined]
+    print(f"{transport}: offered {offered} colours, server received {handler.received} requests")
+    print(
+        f"  sent {summary['count']:.0f} ({summary['count'] / args.seconds:.1f}/s), errors {summary['errors']:.0f}, "
+        f"p50 {summary['p50_ms']:.1f} ms, p95 {summary['p95_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms",
+    )
+
+
+def main() -> None:
+    """Run the benchmark for the chosen transports."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transport', choices=('webhook', 'websocket', 'both'), default='both')
+    parser.add_argument('--delay', type=float, default=0.05, help="stub server response delay in seconds")
+    parser.add_argument('--seconds', type=float, default=3.0, help="how long to send colours")
+    parser.add_argument('--fps', type=float, default=60.0, help="colours offered per second")
+    parser.add_argument('--in-flight', type=int, default=2, help="maximum concurrent requests")
+    args = parser.parse_args()
+
+    for transport in ('webhook', 'websocket'):
+        if args.transport in (transport, 'both'):
+            run(transport, args)
+
+
+if __name__ == '__main__':
+    main()
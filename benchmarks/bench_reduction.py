@@ -0,0 +1,52 @@
+"""Compare the average and dominant colour reductions on synthetic frames."""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+import numpy as np
+
+from rsi.colour import ScreenSampler
+
+RESOLUTIONS = {
+    '1080p': (1080, 1920),
+    '4K': (2160, 3840),
+}
+PRECISIONS = (0, 10, 20, 50, 100)
+
+
+def synthetic_frame(height: int, width: int, seed: int = 0) -> np.ndarray:
+    """Build a BGRA frame with flat colour blocks and a noisy region."""
+    rng = np.random.default_rng(seed)
+    frame = np.empty((height, width, 4), dtype=np.uint8)
+    frame[...] = (40, 40, 40, 255)
+    frame[:height // 2, :width // 2, :3] = (30, 200, 250)
+    frame[height // 2:, width // 2:, :3] = rng.integers(0, 256, (height - height // 2, width - width // 2, 3))
+    return frame
+
+
+def main() -> None:
+    """Run the benchmark and print a table of milliseconds per frame."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20, help="frames timed per case")
+    args = parser.parse_args()
+
+    sampler = ScreenSampler()
+    print(f"{'resolution':>10} {'precision':>9} {'average ms':>10} {'dominant ms':>11}")
+    for name, (height, width) in RESOLUTIONS.items():
+        frame = synthetic_frame(height, width)
+        for colour_precision in PRECISIONS:
+            average = timeit.timeit(lambda: sampler.reduce(frame, colour_precision), number=args.repeat)  # noqa: B023
+            dominant = timeit.timeit(
+                lambda: sampler.reduce_dominant(frame, colour_precision),  # noqa: B023
+                number=args.repeat,
+            )
+            print(
+                f"{name:>10} {colour_precision:>9} "
+                f"{average / args.repeat * 1000:>10.3f} {dominant / args.repeat * 1000:>11.3f}",
+            )
+
+
+if __name__ == '__main__':
+    main()
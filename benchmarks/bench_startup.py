@@ -0,0 +1,173 @@
+"""Measure import time and time-to-first-colour of the headless sync for each backend."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+# Third-party modules that only their own backend may import; the GUI may never load on the sync path
+BACKEND_ONLY = {
+    'requests': {'homeassistant'},
+    'yeelight': {'yeelight'},
+    'websocket': {'homeassistant_ws'},
+}
+NEVER = ('PySimpleGUI', 'rsi.windows')
+MODES = ('wled', 'ddp', 'homeassistant', 'homeassistant_ws', 'yeelight')
+
+CONFIG = """\
+[MODE]
+mode = {mode}
+
+[HOME ASSISTANT]
+home_assistant_ip = 127.0.0.1
+home_assistant_port = 9
+access_token =
+light_entity_id = light.bench
+
+[YEELIGHT]
+yeelight_ip = 127.0.0.1
+
+[WLED]
+wled_ip = 127.0.0.1
+led_count = 256
+
+[DDP]
+ddp_ip = 127.0.0.1
+led_count = 256
+"""
+
+# Runs in a fresh interpreter: build the daemon's pipeline, reduce one synthetic frame and send it
+PROBE = textwrap.dedent("""
+    import os, sys, time
+    from rsi.daemon import SyncDaemon
+    from rsi.colour import ScreenSampler
+    from rsi.utils_.ConfigurationManager import ConfigurationManager
+    import numpy as np
+
+    daemon = SyncDaemon(ConfigurationManager())
+    frame = np.full((1080, 1920, 4), 128, dtype=np.uint8)
+    colour = ScreenSampler().reduce(frame, 20)
+    daemon.sync_engine.light_changer.change_colour(*colour)
+    print(time.monotonic(), flush=True)
+    print('\\n'.join(sys.modules), file=sys.stderr, flush=True)
+    os._exit(0)
+""")
+
+# The GUI entry point only builds windows at import; no backend may load until one is chosen
+GUI_PROBE = textwrap.dedent("""
+    import sys
+    try:
+        import rsi.main
+    except ModuleNotFoundError as err:
+        if err.name != 'PySimpleGUI':
+            raise
+        print('PySimpleGUI')
+        sys.exit(0)
+    print('\\n'.join(sys.modules))
+""")
+
+
+def parse_importtime(stderr: str) -> tuple[dict[str, int], set[str]]:
+    """Get the cumulative microseconds of each top-level import, and every module loaded."""
+    top_level: dict[str, int] = {}
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            modules.add(line.strip())
+            continue
+        _, cumulative, name = line.removeprefix('import time:').split('|')
+        if cumulative.strip().isdigit() and not name.startswith('  '):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules
+
+
+def interpreter_imports() -> set[str]:
+    """Get the top-level imports every interpreter makes before running any code."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-X', 'importtime', '-c', 'pass'], capture_output=True, text=True, check=True,
+    )
+    return set(parse_importtime(result.stderr)[0])
+
+
+def run_probe(mode: str, directory: Path) -> tuple[float, dict[str, int], set[str]]:
+    """Start one interpreter and return its time-to-first-colour, imports and loaded modules."""
+    config_file = directory / f'{mode}.ini'
+    config_file.write_text(CONFIG.format(mode=mode), encoding='utf-8')
+    env = {**os.environ, 'RSI_CONFIG_FILE': str(config_file), 'RSI_CALIBRATION_DIR': str(directory)}
+    start = time.monotonic()
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        capture_output=True, text=True, env=env, cwd=directory, check=True, timeout=60,
+    )
+    first_colour = float(result.stdout.split()[0]) - start
+    top_level, modules = parse_importtime(result.stderr)
+    return first_colour, top_level, modules
+
+
+def gui_imports() -> set[str] | None:
+    """Get every module importing ``rsi.main`` loads, or None if PySimpleGUI is not installed."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', GUI_PROBE], capture_output=True, text=True, check=True, timeout=60,
+    )
+    modules = set(result.stdout.split())
+    return None if modules == {'PySimpleGUI'} else modules
+
+
+def main() -> None:
+    """Run every backend several times and print medians; exit non-zero if a guard fails."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help="interpreters started per backend")
+    parser.add_argument('--max-ms', type=float, default=0, help="fail if time-to-first-colour exceeds this")
+    parser.add_argument('--top', type=int, default=5, help="slowest top-level imports shown per backend")
+    args = parser.parse_args()
+
+    startup = interpreter_imports()
+    failures = []
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = Path(temporary)
+        print(f"{'mode':>16} {'first colour ms':>15} {'imports ms':>10}  slowest imports")
+        for mode in MODES:
+            runs = [run_probe(mode, directory) for _ in range(args.runs)]
+            first_colour = statistics.median(run[0] for run in runs) * 1000
+            import_ms = statistics.median(
+                sum(micros for name, micros in run[1].items() if name not in startup) for run in runs
+            ) / 1000
+            top_level = {name: micros for name, micros in runs[-1][1].items() if name not in startup}
+            modules = runs[-1][2]
+            slowest = sorted(top_level.items(), key=lambda item: -item[1])[:args.top]
+            print(
+                f"{mode:>16} {first_colour:>15.1f} {import_ms:>10.1f}  "
+                + ", ".join(f"{name} {micros / 1000:.1f}" for name, micros in slowest),
+            )
+
+            failures.extend(f"{mode}: imported {name}" for name in NEVER if name in modules)
+            failures.extend(
+                f"{mode}: imported {name}, which only {', '.join(sorted(owners))} needs"
+                for name, owners in BACKEND_ONLY.items()
+                if name in modules and mode not in owners
+            )
+            if args.max_ms and first_colour > args.max_ms:
+                failures.append(f"{mode}: first colour after {first_colour:.1f} ms, over {args.max_ms:.1f} ms")
+
+    gui_modules = gui_imports()
+    if gui_modules is None:
+        print("gui: skipped, PySimpleGUI is not installed")
+    else:
+        failures.extend(
+            f"gui: imported {name} before any backend was chosen" for name in BACKEND_ONLY if name in gui_modules
+        )
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Benchmark the capture-to-packet hot path and save the results as JSON.
+
+``run`` times every case and optionally writes the results to a file and
+compares them against an earlier one; ``compare`` compares two saved
+files. Either exits with status 1 if a case got slower than the threshold.
+Everything runs on synthetic data, so no display or device is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime as dt
+import fnmatch
+import importlib.util
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import rtoml
+from bench_reduction import synthetic_frame
+
+from rsi import colour_space
+from rsi.colour import ScreenSampler, rgb_to_hsv
+from rsi.config import LOGGER_CONFIG_FILE, PRIME_NUMBBERS
+from rsi.logger import ColouredFormatter, JSONLogFormatter, RateLimitedLog, SampledLog
+from rsi.packets import DDPPacketBuilder, WLEDPacketBuilder
+from rsi.utils_.ConfigurationManager import ConfigurationManager
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+SCHEMA_VERSION = 1
+RESOLUTIONS = {
+    '1080p': (1080, 1920),
+    '4K': (2160, 3840),
+    'triple-4K': (2160, 3 * 3840),
+}
+LED_COUNTS = (256, 490, 1024, 2048, 4096)
+HSV_BATCHES = (1, 100, 10_000)
+
+
+@dataclass
+class Case:
+    """One timed operation."""
+
+    name: str
+    func: Callable[[], object]
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+def reduction_cases(precisions: list[int]) -> Iterator[Case]:
+    """Time the frame reductions behind `get_average_screen_colour` and dominant colour mode."""
+    sampler = ScreenSampler()
+    for resolution, (height, width) in RESOLUTIONS.items():
+        frame = synthetic_frame(height, width)
+        for precision in precisions:
+            params = {'resolution': resolution, 'precision': precision}
+            yield Case(
+                f'reduce/average/{resolution}/p{precision}', lambda f=frame, p=precision: sampler.reduce(f, p), params,
+            )
+        yield Case(
+            f'reduce/dominant/{resolution}/p20', lambda f=frame: sampler.reduce_dominant(f, 20),
+            {'resolution': resolution, 'precision': 20},
+        )
+
+
+def hsv_cases() -> Iterator[Case]:
+    """Time the scalar HSV conversion used per colour, and the batch conversion underneath it."""
+    rng = np.random.default_rng(0)
+    yield Case('hsv/scalar', lambda: rgb_to_hsv(200, 120, 40))
+    for count in HSV_BATCHES:
+        colours = rng.integers(0, 256, (count, 3), dtype=np.uint8)
+        yield Case(f'hsv/batch/{count}', lambda c=colours: colour_space.rgb_to_hsv(c), {'colours': count})
+
+
+def packet_cases() -> Iterator[Case]:
+    """Time building one frame of WLED and DDP packets."""
+    rng = np.random.default_rng(0)
+    for led_count in LED_COUNTS:
+        colours = rng.integers(0, 256, (led_count, 3), dtype=np.uint8)
+        wled, ddp = WLEDPacketBuilder(led_count), DDPPacketBuilder(led_count)
+        params = {'leds': led_count}
+        yield Case(f'packets/wled/build/{led_count}', lambda b=wled, c=colours: b.build(c), params)
+        yield Case(f'packets/wled/fill/{led_count}', lambda b=wled: b.fill((200, 120, 40)), params)
+        yield Case(f'packets/ddp/build/{led_count}', lambda b=ddp, c=colours: b.build(c), params)
+
+
+def config_cases(directory: Path, stack: contextlib.ExitStack) -> Iterator[Case]:
+    """Time reading and writing the configuration, in memory and on disk."""
+    for suffix in ('ini', 'toml'):
+        config_manager = ConfigurationManager(directory / f'config.{suffix}')
+        config_manager.read()  # Writes the defaults
+        # Write what updates left pending while the directory still exists
+        stack.callback(config_manager.close)
+        values = iter(range(sys.maxsize))
+
+        def write(config_manager: ConfigurationManager = config_manager, values: Iterator[int] = values) -> None:
+            config_manager.update('ADVANCED', {'color_precision': next(values) % 100})
+            config_manager.flush()
+
+        params = {'format': suffix}
+        yield Case(f'config/get/{suffix}', lambda m=config_manager: m.get_int('ADVANCED', 'color_precision'), params)
+        yield Case(f'config/update/{suffix}', lambda m=config_manager, v=values: m.update(
+            'ADVANCED', {'color_precision': next(v) % 100},
+        ), params)
+        yield Case(f'config/write/{suffix}', write, params)
+        yield Case(f'config/reload/{suffix}', config_manager.reload, params)
+
+
+def logging_cases(stack: contextlib.ExitStack) -> Iterator[Case]:
+    """Time the cost per log record: skipped calls from the hot path, formatting, and emitting to two handlers."""
+    formatters = rtoml.loads(LOGGER_CONFIG_FILE.read_text(encoding='utf-8'))['formatters']
+    colour = ColouredFormatter(formatters['colour']['format'], formatters['colour']['datefmt'])
+    fmt_keys = formatters['json'].get('fmt_keys')
+    encoders = {'json': JSONLogFormatter(fmt_keys=fmt_keys, fast_json=False)}
+    if importlib.util.find_spec('orjson') is not None:
+        encoders['orjson'] = JSONLogFormatter(fmt_keys=fmt_keys)
+
+    logger = logging.getLogger('rsi.bench')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    rate_limited, sampled = RateLimitedLog(logger, interval=3600), SampledLog(logger, every=sys.maxsize)
+    rate_limited.info("Warm up")
+    sampled.info("Warm up")
+    yield Case('logging/skip/level', lambda: logger.debug("Frame %d", 1))
+    yield Case('logging/skip/rate_limited', lambda: rate_limited.warning("Sending colour failed"))
+    yield Case('logging/skip/sampled', lambda: sampled.info("Sent colour %s", (200, 120, 40)))
+
+    record = logger.makeRecord(logger.name, logging.INFO, __file__, 1, "Sent colour %s", ((200, 120, 40),), None)
+    stats_record = logger.makeRecord(
+        logger.name, logging.INFO, __file__, 1, "Sync at %.1f fps", (60.0,), None,
+        extra={'pipeline': {'fps': 60.0, 'stages': {stage: {'p95_ms': 1.0} for stage in ('grab', 'reduce')}}},
+    )
+    yield Case('logging/format/colour', lambda: colour.format(record))
+    for name, formatter in encoders.items():
+        yield Case(f'logging/format/{name}', lambda f=formatter: f.format(record), {'encoder': name})
+        yield Case(f'logging/format/{name}-extra', lambda f=formatter: f.format(stats_record), {'encoder': name})
+
+    null = stack.enter_context(open(os.devnull, 'w', encoding='utf-8'))  # noqa: PTH123, SIM115
+    for formatter in (colour, next(reversed(encoders.values()))):
+        handler = logging.StreamHandler(null)
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+        stack.callback(logger.removeHandler, handler)
+    yield Case('logging/emit', lambda: logger.info("Sent colour %s", (200, 120, 40)))
+
+
+def measure(func: Callable[[], object], min_time: float, repeats: int) -> dict[str, Any]:
+    """Time a function in nanoseconds per call, with enough calls per repeat to fill ``min_time``."""
+    timer = timeit.Timer(func)
+    func()  # Warm caches such as sampling grids
+    loops = 1
+    while (elapsed := timer.timeit(loops)) < min_time:
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    samples = [timer.timeit(loops) / loops * 1e9 for _ in range(repeats)]
+    return {
+        'loops': loops,
+        'min_ns': min(samples),
+        'median_ns': statistics.median(samples),
+        'stdev_ns': statistics.stdev(samples) if repeats > 1 else 0.0,
+    }
+
+
+def metadata() -> dict[str, Any]:
+    """Describe the machine and the code the results belong to."""
+    try:
+        commit = subprocess.run(  # noqa: S603
+            ['git', 'rev-parse', '--short', 'HEAD'],  # noqa: S607
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': dt.datetime.now(dt.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> bool:
+    """Print how each case shared by two result files changed; return whether any regressed."""
+    shared = sorted(baseline['results'].keys() & current['results'].keys())
+    ratios = {
+        name: current['results'][name]['median_ns'] / baseline['results'][name]['median_ns']
+        for name in shared
+    }
+    regressions = [name for name, ratio in ratios.items() if ratio > 1 + threshold]
+    improvements = [name for name, ratio in ratios.items() if ratio < 1 / (1 + threshold)]
+
+    print(f"Comparing {baseline['metadata'].get('commit')} -> {current['metadata'].get('commit')}")
+    for label, names in (('Regressions', regressions), ('Improvements', improvements)):
+        if names:
+            print(f"{label}:")
+        for name in sorted(names, key=ratios.__getitem__, reverse=label == 'Regressions'):
+            print(
+                f"  {name:<40} {baseline['results'][name]['median_ns'] / 1e3:>11.2f} us "
+                f"-> {current['results'][name]['median_ns'] / 1e3:>11.2f} us  ({ratios[name] - 1:+.0%})",
+            )
+    unchanged = len(shared) - len(regressions) - len(improvements)
+    print(f"{len(regressions)} slower, {len(improvements)} faster, {unchanged} within {threshold:.0%}")
+    only_baseline = len(baseline['results'].keys() - current['results'].keys())
+    only_current = len(current['results'].keys() - baseline['results'].keys())
+    if only_baseline or only_current:
+        print(f"{only_baseline} cases only in the baseline, {only_current} only in the current results")
+    return bool(regressions)
+
+
+def run(args: argparse.Namespace) -> bool:
+    """Time the selected cases; return whether any regressed against the baseline."""
+    with tempfile.TemporaryDirectory() as temporary, contextlib.ExitStack() as stack:
+        cases = [
+            *reduction_cases(args.precisions),
+            *hsv_cases(),
+            *packet_cases(),
+            *config_cases(Path(temporary), stack),
+            *logging_cases(stack),
+        ]
+        selected = [case for case in cases if any(fnmatch.fnmatch(case.name, pattern) for pattern in args.filter)]
+
+        results = {}
+        print(f"{'case':<40} {'median us':>12} {'min us':>12} {'stdev':>7}")
+        for case in selected:
+            result = {**case.params, **measure(case.func, args.min_time, args.repeat)}
+            results[case.name] = result
+            print(
+                f"{case.name:<40} {result['median_ns'] / 1e3:>12.2f} {result['min_ns'] / 1e3:>12.2f} "
+                f"{result['stdev_ns'] / result['median_ns']:>7.1%}",
+            )
+
+    report = {'schema': SCHEMA_VERSION, 'metadata': metadata(), 'results': results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        print(f"Saved {len(results)} results to {args.output}")
+    if args.baseline:
+        return compare(json.loads(args.baseline.read_text(encoding='utf-8')), report, args.threshold)
+    return False
+
+
+def main() -> None:
+    """Parse arguments and run or compare."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    thresholds = argparse.ArgumentParser(add_help=False)
+    thresholds.add_argument(
+        '--threshold', type=float, default=0.10, help="slowdown counted as a regression (0.10 = 10%%)",
+    )
+
+    run_parser = commands.add_parser('run', parents=[thresholds], help="time the cases")
+    run_parser.add_argument('--output', type=Path, help="JSON file to save the results to")
+    run_parser.add_argument('--baseline', type=Path, help="JSON results to compare against")
+    run_parser.add_argument(
+        '--filter', nargs='+', default=['*'], metavar='PATTERN', help="only run cases matching these globs",
+    )
+    run_parser.add_argument(
+        '--precisions', nargs='+', type=int, default=list(range(len(PRIME_NUMBBERS))),
+        help="colour precisions to reduce at (default: all)",
+    )
+    run_parser.add_argument('--repeat', type=int, default=5, help="timed repeats per case")
+    run_parser.add_argument('--min-time', type=float, default=0.02, help="seconds each repeat runs for")
+
+    compare_parser = commands.add_parser('compare', parents=[thresholds], help="compare two saved results")
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        regressed = run(args)
+    else:
+        regressed = compare(
+            json.loads(args.baseline.read_text(encoding='utf-8')),
+            json.loads(args.current.read_text(encoding='utf-8')),
+            args.threshold,
+        )
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
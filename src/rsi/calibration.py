@@ -0,0 +1,158 @@
+"""Per-device colour calibration with precomputed 3D lookup tables."""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from configparser import SectionProxy
+    from pathlib import Path
+
+    from rsi.types import LightChanger
+
+logger = logging.getLogger(__name__)
+
+_IDENTITY_MATRIX = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0)
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """
+    How one device's output differs from what the screen shows.
+
+    Colours pass through ``gamma`` (the device's response curve), the 3x3
+    ``matrix`` (row-major, for channel cross-talk or a tinted white), a
+    ``brightness_curve`` exponent on the brightest channel, and finally a
+    ``min_brightness`` floor (0-1) below which dim colours would turn the
+    device off. The whole chain is baked into a LUT of ``2 ** bits`` levels
+    per channel.
+    """
+
+    gamma: float = 1.0
+    matrix: tuple[float, ...] = _IDENTITY_MATRIX
+    brightness_curve: float = 1.0
+    min_brightness: float = 0.0
+    bits: int = 6
+
+    @classmethod
+    def from_config(cls: type[Calibration], section: SectionProxy) -> Calibration:
+        """Read a calibration from the ``calibration_*`` options of a device section."""
+        matrix = section.get('calibration_matrix')
+        return cls(
+            gamma=section.getfloat('calibration_gamma', fallback=1.0),
+            matrix=tuple(float(value) for value in matrix.split(',')) if matrix else _IDENTITY_MATRIX,
+            brightness_curve=section.getfloat('calibration_brightness_curve', fallback=1.0),
+            min_brightness=section.getfloat('calibration_min_brightness', fallback=0.0),
+            bits=section.getint('calibration_bits', fallback=6),
+        )
+
+    @property
+    def identity(self) -> bool:
+        """Whether the calibration leaves colours unchanged."""
+        return dataclasses.replace(self, bits=Calibration.bits) == Calibration()
+
+    def transform(self, rgb: np.ndarray) -> np.ndarray:
+        """Calibrate ``(..., 3)`` RGB colours (0-255) exactly, returning uint8."""
+        colours = (np.asarray(rgb) / 255) ** self.gamma
+        colours = np.clip(colours @ np.reshape(self.matrix, (3, 3)).T, 0, 1)
+
+        level = colours.max(axis=-1, keepdims=True)
+        target = level ** self.brightness_curve
+        target = np.where(level > 0, np.maximum(target, self.min_brightness), 0)
+        colours *= target / np.where(level > 0, level, 1)
+        return np.rint(np.clip(colours, 0, 1) * 255).astype(np.uint8)
+
+    def build_lut(self) -> np.ndarray:
+        """Tabulate the calibration as a ``(2 ** bits,) * 3 + (3,)`` uint8 LUT."""
+        levels = np.arange(1 << self.bits) * 255 / ((1 << self.bits) - 1)
+        grid = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1)
+        return self.transform(grid)
+
+
+class CalibrationLUT:
+    """Apply a calibration with one fancy index per batch of colours."""
+
+    def __init__(self, lut: np.ndarray) -> None:
+        """Wrap a LUT built by `Calibration.build_lut`."""
+        self.lut = lut
+        self.shift = 8 - int(np.log2(lut.shape[0]))
+
+    def apply(self, rgb: np.ndarray) -> np.ndarray:
+        """Calibrate ``(..., 3)`` uint8 RGB colours."""
+        index = np.right_shift(rgb, self.shift)
+        return self.lut[index[..., 0], index[..., 1], index[..., 2]]
+
+    def apply_colour(self, red: int, green: int, blue: int) -> tuple[int, int, int]:
+        """Calibrate a single RGB colour."""
+        calibrated_red, calibrated_green, calibrated_blue = self.lut[
+            red >> self.shift, green >> self.shift, blue >> self.shift,
+        ].tolist()
+        return calibrated_red, calibrated_green, calibrated_blue
+
+
+def _lut_path(directory: Path, device: str) -> Path:
+    return directory / f"{re.sub(r'[^A-Za-z0-9_-]+', '_', device).strip('_').lower()}.npz"
+
+
+@functools.lru_cache(maxsize=16)
+def load_lut(calibration: Calibration, directory: Path, device: str) -> CalibrationLUT:
+    """
+    Get the LUT of a device, building it only if its calibration changed.
+
+    LUTs are saved as ``.npz`` files in ``directory`` together with the
+    parameters they were built from; a file whose parameters no longer
+    match is rebuilt and replaced atomically.
+    """
+    path = _lut_path(directory, device)
+    params = json.dumps(dataclasses.asdict(calibration), sort_keys=True)
+    try:
+        with np.load(path) as saved:
+            if str(saved['params']) == params:
+                return CalibrationLUT(saved['lut'])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    logger.info("Building calibration LUT for %s", device)
+    lut = calibration.build_lut()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp.npz')
+        np.savez(temporary, lut=lut, params=np.array(params))
+        temporary.replace(path)
+    except OSError:
+        logger.exception("Saving calibration LUT for %s failed", device)
+    return CalibrationLUT(lut)
+
+
+class CalibratedLightChanger:
+    """Calibrate colours before passing them to another light changer."""
+
+    def __init__(self, light_changer: LightChanger, lut: CalibrationLUT) -> None:
+        """Initialise calibrated light changer."""
+        self.light_changer = light_changer
+        self.lut = lut
+        self.keepalive = light_changer.keepalive
+
+    def change_colour(self, red: int, green: int, blue: int) -> None:
+        """Set the calibrated light colour."""
+        self.light_changer.change_colour(*self.lut.apply_colour(red, green, blue))
+
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Set calibrated per-LED colours."""
+        self.light_changer.change_colours(self.lut.apply(colours))
+
+    def default_colour(self) -> None:
+        """Set the device's own default colour, uncalibrated."""
+        self.light_changer.default_colour()
+
+    def close(self) -> None:
+        """Close the wrapped light changer."""
+        self.light_changer.close()
@@ -3,38 +3,63 @@
 from __future__ import annotations
 
 import logging
+import threading
+from typing import TYPE_CHECKING
 
 import mss
 import numpy as np
 
-from rsi.config import PRIME_NUMBBERS
+from rsi import colour_space
+from rsi.sampling import OffsetMode, get_sampling_grid
+from rsi.types import ColourMode
+from rsi.zones import reduce_zones
+
+if TYPE_CHECKING:
+    from mss.base import MSSBase
+
+    from rsi.tiles import TileReducer
+    from rsi.zones import ZoneLayout
 
 logger = logging.getLogger(__name__)
 
+_BGRA_CHANNELS = 4
+_COLOUR_CHANNELS = 3
+
+_thread_local = threading.local()
+
 
 def rgb_to_hsv(red: int, green: int, blue: int) -> tuple[int, float, float]:
     """Convert RGB to HSV."""
-    r = red / 255
-    g = green / 255
-    b = blue / 255
-
-    mx = max(r, g, b)
-    mn = min(r, g, b)
-    delta = mx-mn
-
-    if mx == mn:
-        h = 0.
-    elif mx == r:
-        h = (60 * ((g - b) / delta) + 360) % 360
-    elif mx == g:
-        h = (60 * ((b - r) / delta) + 120) % 360
-    else:
-        h = (60 * ((r - g) / delta) + 240) % 360
+    hue, saturation, value = colour_space.rgb_to_hsv(np.array((red, green, blue))).tolist()
+    return round(hue), round(saturation, 1), round(value, 1)
+
 
-    s = 0 if mx == 0 else delta / mx
-    v = mx
+def dominant_colour(pixels: np.ndarray, bits: int = 5, top_buckets: int = 1) -> tuple[int, int, int]:
+    """
+    Find the dominant colour of an ``(N, 3)`` array of BGR pixels.
 
-    return round(h), round(s * 100, 1), round(v * 100, 1)
+    Pixels are quantized to ``bits`` bits per channel (15-bit keys by default,
+    18-bit with ``bits=6``) and counted with a single bincount. The result is
+    the mean of the pixels in the ``top_buckets`` most common buckets, so it
+    keeps full 8-bit precision instead of snapping to the bucket centre.
+    """
+    if not pixels.size:
+        return 0, 0, 0
+
+    shift = 8 - bits
+    quantized = pixels >> shift
+    keys = quantized[:, 0].astype(np.intp) << (2 * bits)
+    keys |= quantized[:, 1].astype(np.intp) << bits
+    keys |= quantized[:, 2]
+
+    counts = np.bincount(keys, minlength=1 << (3 * bits))
+    if top_buckets == 1:
+        in_top = keys == counts.argmax()
+    else:
+        in_top = np.isin(keys, np.argpartition(counts, -top_buckets)[-top_buckets:])
+
+    blue, green, red = np.rint(pixels[in_top].mean(axis=0)).astype(int).tolist()
+    return red, green, blue
 
 def get_screens_list() -> list[str | int]:
     """Get screens for GUI dropdown list."""
@@ -52,18 +77,245 @@ def get_screens_list() -> list[str | int]:
 
         return screens_list
 
-def get_average_screen_colour(monitor_num: int, colour_precision: int) -> tuple[int, int, int]:
-    """Calculate the average screen colour."""
-    with mss.mss() as sct:
-        sct_img = sct.grab(sct.monitors[monitor_num])
 
-    # Save screenshot to file (commented so disabled)
-    # mss.tools.to_png(sct_img.rgb, sct_img.size, output="test.png")  # noqa: ERA001
+class ActiveAreaDetector:
+    """
+    Find and cache the non-black content area of a screen.
+
+    Letterbox and pillarbox bars are detected on a full grab, after which
+    only the content rectangle is grabbed. The full screen is checked again
+    every ``redetect_interval`` frames, or sooner if an edge of the cached
+    area turns black.
+    """
+
+    def __init__(
+        self,
+        black_threshold: int = 24,
+        redetect_interval: int = 60,
+        probe_step: int = 4,
+        symmetry_tolerance: float = 0.02,
+    ) -> None:
+        """Initialise active area detector."""
+        self.black_threshold = black_threshold
+        self.redetect_interval = redetect_interval
+        self.probe_step = probe_step
+        self.symmetry_tolerance = symmetry_tolerance
+        self._monitor_key: tuple[int, int, int, int] | None = None
+        self._region: dict[str, int] | None = None
+        self._frames_until_detect = 0
+
+    @property
+    def region(self) -> dict[str, int] | None:
+        """Get the cached content area as an mss monitor dict."""
+        return self._region
+
+    def reset(self) -> None:
+        """Forget the cached content area."""
+        self._monitor_key = None
+        self._region = None
+        self._frames_until_detect = 0
+
+    def _bar_bounds(self, active: np.ndarray, length: int) -> tuple[int, int]:
+        """Get the content bounds along one axis, or the full axis if the bars are not symmetric."""
+        hits = np.flatnonzero(active)
+        if not hits.size:
+            # An all-black frame (fade to black) says nothing about the bars
+            return 0, length
+        start = int(hits[0]) * self.probe_step
+        stop = min(length, (int(hits[-1]) + 1) * self.probe_step)
+        if abs(start - (length - stop)) > self.symmetry_tolerance * length + self.probe_step:
+            # Dark content on one side only, not a bar
+            return 0, length
+        return start, stop
+
+    def detect(self, frame: np.ndarray) -> tuple[int, int, int, int]:
+        """Get the ``(top, bottom, left, right)`` bounds of the content in a BGRA frame."""
+        height, width = frame.shape[:2]
+        probe = frame[::self.probe_step, ::self.probe_step, :_COLOUR_CHANNELS].max(axis=2) > self.black_threshold
+        top, bottom = self._bar_bounds(probe.any(axis=1), height)
+        left, right = self._bar_bounds(probe.any(axis=0), width)
+        return top, bottom, left, right
+
+    def _edges_black(self, frame: np.ndarray) -> bool:
+        """Check whether any edge of the cropped frame has turned black."""
+        step = self.probe_step
+        edges = (
+            frame[0, ::step, :_COLOUR_CHANNELS],
+            frame[-1, ::step, :_COLOUR_CHANNELS],
+            frame[::step, 0, :_COLOUR_CHANNELS],
+            frame[::step, -1, :_COLOUR_CHANNELS],
+        )
+        return any(int(edge.max()) <= self.black_threshold for edge in edges)
+
+    def grab(self, sampler: ScreenSampler, monitor: dict[str, int]) -> np.ndarray:
+        """Grab only the content area of a monitor, re-detecting it when due."""
+        monitor_key = (monitor['left'], monitor['top'], monitor['width'], monitor['height'])
+
+        if self._region is not None and monitor_key == self._monitor_key and self._frames_until_detect > 0:
+            frame = sampler.grab(self._region)
+            self._frames_until_detect -= 1
+            if self._edges_black(frame):
+                self._frames_until_detect = 0
+            return frame
+
+        frame = sampler.grab(monitor)
+        top, bottom, left, right = self.detect(frame)
+        self._monitor_key = monitor_key
+        self._region = {
+            'left': monitor['left'] + left,
+            'top': monitor['top'] + top,
+            'width': right - left,
+            'height': bottom - top,
+        }
+        self._frames_until_detect = self.redetect_interval
+        if (top, bottom, left, right) != (0, monitor['height'], 0, monitor['width']):
+            logger.debug("Active area of %s is %s", monitor, self._region)
+        # Compact the crop so the sampling grid can index it as flat pixels
+        return np.ascontiguousarray(frame[top:bottom, left:right])
+
 
-    # mss grabs the pictures as bgra, this code changes it to a RGB array
-    frame = np.array(sct_img, dtype=np.uint8)
-    rgb_img = np.flip(frame[:, :, :3], 2)
+class ScreenSampler:
+    """
+    Long-lived screen capture session.
 
-    # Calculating the average color numbers
-    sample_rate = PRIME_NUMBBERS[colour_precision]  # Sample every sample_rate'th pixel.
-    return np.average(rgb_img[::sample_rate], (0, 1))
+    Keeps a single mss handle open between frames and reduces the grabbed
+    BGRA buffer in place, so a frame costs one grab and one strided sum
+    instead of two full-frame copies. Pixels are picked by a cached 2-D
+    sampling grid, see `rsi.sampling`. With an `ActiveAreaDetector`,
+    black bars are cropped away before grabbing, and with a `TileReducer`
+    only the parts of the screen that changed are reduced again.
+
+    The mss handle is opened lazily by the first grab, because some
+    platforms bind it to the thread that created it.
+    """
+
+    def __init__(
+        self,
+        offset_mode: OffsetMode = OffsetMode.PRIME,
+        active_area: ActiveAreaDetector | None = None,
+        tile_reducer: TileReducer | None = None,
+        dominant_bits: int = 5,
+        dominant_buckets: int = 1,
+    ) -> None:
+        """Initialise screen sampler."""
+        self.offset_mode = offset_mode
+        self.active_area = active_area
+        self.tile_reducer = tile_reducer
+        self.dominant_bits = dominant_bits
+        self.dominant_buckets = dominant_buckets
+        self._sct: MSSBase | None = None
+        self._sums = np.zeros(_COLOUR_CHANNELS, dtype=np.uint64)
+        self._scratch = np.empty((0, _BGRA_CHANNELS), dtype=np.uint8)
+
+    @property
+    def sct(self) -> MSSBase:
+        """Get the open mss handle, opening one if needed."""
+        if self._sct is None:
+            self._sct = mss.mss()
+        return self._sct
+
+    @property
+    def monitors(self) -> list[dict[str, int]]:
+        """Get the monitors known to the capture session."""
+        return self.sct.monitors
+
+    def grab(self, monitor: dict[str, int]) -> np.ndarray:
+        """Grab a region of the screen as a read-only BGRA view of the capture buffer."""
+        sct_img = self.sct.grab(monitor)
+        width, height = sct_img.size
+        # mss grabs the pictures as bgra; view the raw buffer instead of copying it
+        return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(height, width, _BGRA_CHANNELS)
+
+    def sample(self, frame: np.ndarray, colour_precision: int) -> np.ndarray:
+        """Pick the sampled BGR pixels of a BGRA frame, as a view wherever possible."""
+        height, width = frame.shape[:2]
+        grid = get_sampling_grid(height, width, colour_precision, self.offset_mode)
+
+        if grid.indices is None:
+            return frame[::grid.row_stride, ::grid.col_stride, :_COLOUR_CHANNELS]
+
+        if self._scratch.shape[0] != grid.indices.size:
+            self._scratch = np.empty((grid.indices.size, _BGRA_CHANNELS), dtype=np.uint8)
+        np.take(frame.reshape(-1, _BGRA_CHANNELS), grid.indices, axis=0, out=self._scratch)
+        return self._scratch[:, :_COLOUR_CHANNELS]
+
+    def reduce(self, frame: np.ndarray, colour_precision: int) -> tuple[int, int, int]:
+        """Average a BGRA frame into an RGB colour."""
+        sampled = self.sample(frame, colour_precision)
+        pixel_count = sampled.size // _COLOUR_CHANNELS
+        if not pixel_count:
+            return 0, 0, 0
+
+        np.sum(sampled, axis=tuple(range(sampled.ndim - 1)), dtype=np.uint64, out=self._sums)
+
+        # Only the three reduced values need reordering from BGR to RGB
+        blue, green, red = (round(int(channel) / pixel_count) for channel in self._sums)
+        return red, green, blue
+
+    def reduce_dominant(self, frame: np.ndarray, colour_precision: int) -> tuple[int, int, int]:
+        """Find the dominant RGB colour of a BGRA frame."""
+        sampled = self.sample(frame, colour_precision).reshape(-1, _COLOUR_CHANNELS)
+        return dominant_colour(sampled, self.dominant_bits, self.dominant_buckets)
+
+    def grab_monitor(self, monitor_num: int) -> np.ndarray:
+        """Grab a monitor, cropped to its active area when detection is enabled."""
+        monitor = self.monitors[monitor_num]
+        if self.active_area is None:
+            return self.grab(monitor)
+        return self.active_area.grab(self, monitor)
+
+    def reduce_screen(
+        self,
+        frame: np.ndarray,
+        colour_precision: int,
+        colour_mode: ColourMode = ColourMode.AVERAGE,
+    ) -> tuple[int, int, int]:
+        """Reduce a grabbed frame with the given reduction mode."""
+        if colour_mode == ColourMode.DOMINANT:
+            return self.reduce_dominant(frame, colour_precision)
+        if self.tile_reducer is not None:
+            return self.tile_reducer.reduce(frame, colour_precision, self.offset_mode)
+        return self.reduce(frame, colour_precision)
+
+    def get_average_screen_colour(self, monitor_num: int, colour_precision: int) -> tuple[int, int, int]:
+        """Calculate the average screen colour."""
+        return self.reduce_screen(self.grab_monitor(monitor_num), colour_precision)
+
+    def get_dominant_screen_colour(self, monitor_num: int, colour_precision: int) -> tuple[int, int, int]:
+        """Calculate the dominant screen colour."""
+        return self.reduce_dominant(self.grab_monitor(monitor_num), colour_precision)
+
+    def get_screen_colour(
+        self,
+        monitor_num: int,
+        colour_precision: int,
+        colour_mode: ColourMode = ColourMode.AVERAGE,
+    ) -> tuple[int, int, int]:
+        """Calculate the screen colour with the given reduction mode."""
+        return self.reduce_screen(self.grab_monitor(monitor_num), colour_precision, colour_mode)
+
+    def get_zone_colours(self, monitor_num: int, colour_precision: int, layout: ZoneLayout) -> np.ndarray:
+        """Calculate the average colour of each edge zone as an ``(N, 3)`` RGB array."""
+        return reduce_zones(self.grab_monitor(monitor_num), colour_precision, layout)
+
+    def refresh(self) -> None:
+        """Reopen the capture session, picking up connected or disconnected screens."""
+        self.close()
+        if self.active_area is not None:
+            self.active_area.reset()
+        if self.tile_reducer is not None:
+            self.tile_reducer.reset()
+
+    def close(self) -> None:
+        """Release the mss handle."""
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+
+def get_average_screen_colour(monitor_num: int, colour_precision: int) -> tuple[int, int, int]:
+    """Calculate the average screen colour using a per-thread capture session."""
+    sampler = getattr(_thread_local, 'sampler', None)
+    if sampler is None:
+        sampler = _thread_local.sampler = ScreenSampler()
+    return sampler.get_average_screen_colour(monitor_num, colour_precision)
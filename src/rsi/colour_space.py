@@ -0,0 +1,164 @@
+"""Vectorized colour space conversions for arrays of colours."""
+
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from configparser import SectionProxy
+
+# sRGB (D65) to CIE XYZ
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+
+_LAB_EPSILON = 216 / 24389
+_LAB_KAPPA = 24389 / 27
+
+
+def _srgb_to_linear(srgb: np.ndarray) -> np.ndarray:
+    """Undo the sRGB transfer curve of values in the 0-1 range."""
+    return np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)  # noqa: PLR2004
+
+
+# Every 8-bit channel value converted once, so uint8 input is a table lookup
+_SRGB8_TO_LINEAR = _srgb_to_linear(np.arange(256) / 255)
+
+
+def srgb_to_linear(rgb: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 3)`` sRGB colours (0-255) to linear RGB (0-1)."""
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8:
+        return _SRGB8_TO_LINEAR[rgb]
+    return _srgb_to_linear(rgb / 255)
+
+
+def linear_to_srgb(linear: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 3)`` linear RGB colours (0-1) to sRGB (0-255), clipping out-of-gamut values."""
+    linear = np.clip(linear, 0, 1)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)  # noqa: PLR2004
+    return srgb * 255
+
+
+def rgb_to_hsv(rgb: np.ndarray) -> np.ndarray:
+    """
+    Convert ``(..., 3)`` RGB colours (0-255) to HSV.
+
+    Hue is in degrees (0-360), saturation and value in percent (0-100).
+    """
+    rgb = np.asarray(rgb) / 255
+    red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    mx = rgb.max(axis=-1)
+    delta = mx - rgb.min(axis=-1)
+    grey = delta == 0
+    # Grey has no hue; divide by 1 there so no branch divides by zero
+    delta_or_one = delta + grey
+
+    hsv = np.empty(rgb.shape)
+    hue = np.where(mx == green, 60 * ((blue - red) / delta_or_one) + 120, 60 * ((red - green) / delta_or_one) + 240)
+    hue = np.where(mx == red, 60 * ((green - blue) / delta_or_one) + 360, hue)
+    hue[grey] = 0
+    np.mod(hue, 360, out=hsv[..., 0])
+    np.multiply(delta / (mx + (mx == 0)), 100, out=hsv[..., 1])
+    np.multiply(mx, 100, out=hsv[..., 2])
+    return hsv
+
+
+def hsv_to_rgb(hsv: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 3)`` HSV colours (degrees, percent, percent) to RGB (0-255)."""
+    hsv = np.asarray(hsv, dtype=np.float64)
+    hue = hsv[..., 0] % 360 / 60
+    saturation = hsv[..., 1] / 100
+    value = hsv[..., 2] / 100 * 255
+    # Each channel ramps between value and value * (1 - saturation) around the hue circle
+    k = (np.array([5, 3, 1]) + hue[..., None]) % 6
+    ramp = np.clip(np.minimum(k, 4 - k), 0, 1)
+    return value[..., None] * (1 - saturation[..., None] * ramp)
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 3)`` sRGB colours (0-255) to CIELAB under D65."""
+    xyz = srgb_to_linear(rgb) @ _RGB_TO_XYZ.T / _D65_WHITE
+    f = np.where(xyz > _LAB_EPSILON, np.cbrt(xyz), (_LAB_KAPPA * xyz + 16) / 116)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def lab_to_rgb(lab: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 3)`` CIELAB colours under D65 to sRGB (0-255), clipping out-of-gamut values."""
+    lab = np.asarray(lab, dtype=np.float64)
+    f = np.empty_like(lab)
+    f[..., 1] = (lab[..., 0] + 16) / 116
+    f[..., 0] = f[..., 1] + lab[..., 1] / 500
+    f[..., 2] = f[..., 1] - lab[..., 2] / 200
+    xyz = np.where(f ** 3 > _LAB_EPSILON, f ** 3, (116 * f - 16) / _LAB_KAPPA)
+    return linear_to_srgb(xyz * _D65_WHITE @ _XYZ_TO_RGB.T)
+
+
+def delta_e(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """Get the CIE76 colour difference between ``(..., 3)`` CIELAB colours."""
+    return np.linalg.norm(np.asarray(lab1) - np.asarray(lab2), axis=-1)
+
+
+# Broadcasts against (N, 3) colours so each column indexes its own channel of a (256, 3) table
+_CHANNELS = np.arange(3)
+
+
+@dataclass(frozen=True)
+class ColourCorrection:
+    """
+    Per-channel output correction for lights.
+
+    ``gamma`` bends the response curve (above 1 darkens mid tones, which
+    suits most LED strips), ``white_balance`` scales each channel, and
+    ``max_brightness`` (0-1) caps the overall output. All three are folded
+    into one 8-bit lookup table, so correcting any number of colours is a
+    single gather.
+    """
+
+    gamma: float = 1.0
+    white_balance: tuple[float, float, float] = (1.0, 1.0, 1.0)
+    max_brightness: float = 1.0
+
+    @classmethod
+    def from_config(cls: type[ColourCorrection], section: SectionProxy) -> ColourCorrection:
+        """Read a colour correction from the ``ADVANCED`` config section."""
+        red, green, blue = (float(gain) for gain in section.get('white_balance', '1.0, 1.0, 1.0').split(','))
+        return cls(
+            gamma=section.getfloat('gamma', fallback=1.0),
+            white_balance=(red, green, blue),
+            max_brightness=section.getint('max_brightness', fallback=100) / 100,
+        )
+
+    @property
+    def identity(self) -> bool:
+        """Whether the correction leaves colours unchanged."""
+        return self.gamma == 1 and self.white_balance == (1, 1, 1) and self.max_brightness == 1
+
+    @functools.cached_property
+    def lut(self) -> np.ndarray:
+        """``(256, 3)`` table of corrected values for every 8-bit input, per channel."""
+        levels = (np.arange(256) / 255) ** self.gamma
+        scaled = levels[:, None] * np.asarray(self.white_balance) * self.max_brightness * 255
+        return np.rint(np.clip(scaled, 0, 255)).astype(np.uint8)
+
+    def apply(self, rgb: np.ndarray) -> np.ndarray:
+        """Correct ``(..., 3)`` uint8 RGB colours."""
+        return self.lut[rgb, _CHANNELS]
+
+    def apply_colour(self, red: int, green: int, blue: int) -> tuple[int, int, int]:
+        """Correct a single RGB colour."""
+        lut = self.lut
+        return int(lut[red, 0]), int(lut[green, 1]), int(lut[blue, 2])
@@ -0,0 +1,212 @@
+"""Drive several light devices at once."""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import operator
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Union
+
+from rsi.stats import LatencyStats
+from rsi.sync import LatestSlot
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from rsi.types import LightChanger
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.5  # seconds
+_BACKOFF_MIN = 0.5  # seconds
+_BACKOFF_MAX = 10  # seconds
+_UNHEALTHY_AFTER = 3  # consecutive failures
+_DEFAULT_TIMEOUT = 10  # seconds
+
+# An action is called with the worker's light changer at the time it runs
+Command = tuple[Callable[['LightChanger'], None], Union['concurrent.futures.Future[None]', None]]
+
+
+class DeviceWorker:
+    """
+    Send colours to one device from its own thread.
+
+    Colours that arrive while the device is busy replace the pending one,
+    so a slow device falls behind by at most a frame without holding up
+    the others. ``max_rate`` caps how many colours per second the device
+    is sent. Failures are counted rather than raised, and a failing device
+    is retried with exponential backoff. A replaced light changer is closed
+    by the worker itself, once it is no longer using it.
+    """
+
+    def __init__(self, name: str, light_changer: LightChanger, max_rate: float = 0) -> None:
+        """Initialise device worker; a ``max_rate`` of 0 sends as fast as the device allows."""
+        self.name = name
+        self.light_changer = light_changer
+        self.min_interval = 1 / max_rate if max_rate > 0 else 0.0
+        self.latency = LatencyStats()
+        self.consecutive_failures = 0
+        self.last_error: str | None = None
+
+        self._pending: LatestSlot[Command] = LatestSlot()
+        self._lock = threading.Lock()
+        self._retired: list[LightChanger] = []
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'rsi-device-{name}', daemon=True)
+        self._thread.start()
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the device has been accepting colours recently."""
+        return self.consecutive_failures < _UNHEALTHY_AFTER
+
+    def submit(self, action: Callable[[LightChanger], None]) -> None:
+        """Queue an action, replacing any action not yet started."""
+        self._pending.put((action, None))
+
+    def submit_and_track(self, action: Callable[[LightChanger], None]) -> concurrent.futures.Future[None]:
+        """Queue an action and return a future that completes when it has run."""
+        future: concurrent.futures.Future[None] = concurrent.futures.Future()
+        self._pending.put((action, future))
+        return future
+
+    def health(self) -> dict[str, Any]:
+        """Health and latency summary of the device."""
+        return {
+            'healthy': self.healthy,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            'superseded': self._pending.dropped,
+            **self.latency.summary(),
+        }
+
+    def _record_failure(self, err: Exception) -> float:
+        """Count a failure and return how long to back off."""
+        self.latency.record_error()
+        self.consecutive_failures += 1
+        self.last_error = repr(err)
+        if self.consecutive_failures == _UNHEALTHY_AFTER:
+            logger.warning("Device %s is failing: %s", self.name, self.last_error)
+        return min(_BACKOFF_MIN * 2 ** (self.consecutive_failures - 1), _BACKOFF_MAX)
+
+    def _record_success(self, elapsed: float) -> None:
+        self.latency.record(elapsed)
+        if not self.healthy:
+            logger.info("Device %s recovered", self.name)
+        self.consecutive_failures = 0
+
+    def replace(self, light_changer: LightChanger, *, close_previous: bool = True) -> None:
+        """Run future actions on a different light changer, closing the previous one once it is idle."""
+        with self._lock:
+            if close_previous and light_changer is not self.light_changer:
+                self._retired.append(self.light_changer)
+            self.light_changer = light_changer
+
+    def _close_retired(self) -> None:
+        with self._lock:
+            retired, self._retired = self._retired, []
+        for light_changer in retired:
+            try:
+                light_changer.close()
+            except Exception:  # noqa: PERF203
+                logger.exception("Closing the replaced %s device failed", self.name)
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._close_retired()
+            command = self._pending.take(_POLL_INTERVAL)
+            if command is None:
+                continue
+            action, future = command
+            with self._lock:
+                light_changer = self.light_changer
+            start = time.perf_counter()
+            try:
+                action(light_changer)
+            except Exception as err:  # noqa: BLE001 - one broken device must not stop the others
+                if future is not None:
+                    future.set_exception(err)
+                self._closed.wait(self._record_failure(err))
+                continue
+
+            elapsed = time.perf_counter() - start
+            self._record_success(elapsed)
+            if future is not None:
+                future.set_result(None)
+            if elapsed < self.min_interval:
+                self._closed.wait(self.min_interval - elapsed)
+
+    def close(self) -> None:
+        """Stop the worker and close the device if it holds resources."""
+        self._closed.set()
+        self._thread.join(_DEFAULT_TIMEOUT)
+        self._close_retired()
+        self.light_changer.close()
+
+
+class CompositeLightChanger:
+    """Fan colours out to several light changers, each on its own worker."""
+
+    def __init__(self, devices: dict[str, LightChanger], max_rates: dict[str, float] | None = None) -> None:
+        """Initialise composite light changer from named devices and optional per-device rates."""
+        max_rates = max_rates or {}
+        self.workers = [
+            DeviceWorker(name, light_changer, max_rates.get(name, 0))
+            for name, light_changer in devices.items()
+        ]
+        keepalives = [light_changer.keepalive for light_changer in devices.values() if light_changer.keepalive]
+        self.keepalive = min(keepalives, default=None)
+
+    def change_colour(self, red: int, green: int, blue: int) -> None:
+        """Queue a colour for every device."""
+        for worker in self.workers:
+            worker.submit(operator.methodcaller('change_colour', red, green, blue))
+
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Queue per-LED colours for every device."""
+        for worker in self.workers:
+            worker.submit(operator.methodcaller('change_colours', colours))
+
+    def default_colour(self) -> None:
+        """Set every device to its default colour, raising only if none of them could be reached."""
+        futures = {
+            worker.submit_and_track(operator.methodcaller('default_colour')): worker
+            for worker in self.workers
+        }
+        done, _ = concurrent.futures.wait(futures, _DEFAULT_TIMEOUT)
+        succeeded = [future for future in done if future.exception() is None]
+        for future, worker in futures.items():
+            if future not in succeeded:
+                logger.warning("Device %s did not take the default colour", worker.name)
+        if futures and not succeeded:
+            msg = "No device took the default colour."
+            raise OSError(msg)
+
+    def replace(
+        self,
+        name: str,
+        light_changer: LightChanger,
+        max_rate: float = 0,
+        *,
+        close_previous: bool = True,
+    ) -> None:
+        """Send a device's future colours to a different light changer, at a possibly new rate."""
+        for worker in self.workers:
+            if worker.name == name:
+                worker.replace(light_changer, close_previous=close_previous)
+                worker.min_interval = 1 / max_rate if max_rate > 0 else 0.0
+        self.keepalive = min(
+            (worker.light_changer.keepalive for worker in self.workers if worker.light_changer.keepalive),
+            default=None,
+        )
+
+    def health(self) -> dict[str, dict[str, Any]]:
+        """Health and latency summary per device."""
+        return {worker.name: worker.health() for worker in self.workers}
+
+    def close(self) -> None:
+        """Stop every worker and close the devices."""
+        for worker in self.workers:
+            worker.close()
@@ -1,23 +1,52 @@
 """Global config options of the package."""
 
 import os
-from importlib import resources as pkg_resources
+import sys
+import tempfile
 from pathlib import Path
 
-from dotenv import load_dotenv
+PACKAGE_NAME = "rsi"
+PACKAGE_DIR = Path(__file__).resolve().parent
 
-import rsi
 
-load_dotenv()
+def _load_env_file() -> None:
+    """
+    Load the nearest ``.env`` file into the environment.
+
+    Looks in the package directory and its parents (the working directory
+    for frozen executables), as python-dotenv's own search does, but only
+    imports python-dotenv when there is a file to load.
+    """
+    start = Path.cwd() if getattr(sys, 'frozen', False) else PACKAGE_DIR
+    for directory in (start, *start.parents):
+        env_file = directory / '.env'
+        if env_file.is_file():
+            from dotenv import load_dotenv
+
+            load_dotenv(env_file)
+            return
 
-PACKAGE_NAME = "rsi"
 
-with pkg_resources.as_file(pkg_resources.files(rsi)) as package_dir:
-    DEFAULT_LOGGER_CONFIG_FILE_PATH = package_dir / 'logger_config.toml'
-    DEFAULT_RSI_CONFIG_FILE_PATH = package_dir / 'rsi_config.toml'
+_load_env_file()
+
+DEFAULT_LOGGER_CONFIG_FILE_PATH = PACKAGE_DIR / 'logger_config.toml'
+DEFAULT_RSI_CONFIG_FILE_PATH = PACKAGE_DIR / 'rsi_config.toml'
 
 LOGGER_CONFIG_FILE = Path(os.environ.get("RSI_LOGGER_CONFIG_FILE", DEFAULT_LOGGER_CONFIG_FILE_PATH))
 RSI_CONFIG_FILE = Path(os.environ.get("RSI_CONFIG_FILE", DEFAULT_RSI_CONFIG_FILE_PATH))
+# The user's settings: config.ini in the working directory, unless RSI_CONFIG_FILE names a file (INI or TOML)
+CONFIG_FILE = RSI_CONFIG_FILE if "RSI_CONFIG_FILE" in os.environ else Path("config.ini")
+# Control socket of the headless daemon
+CONTROL_SOCKET = Path(os.environ.get(
+    "RSI_CONTROL_SOCKET",
+    Path(os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir())) / "rsi.sock",
+))
+
+
+def calibration_dir(config_file: Path = CONFIG_FILE) -> Path:
+    """Get the folder of per-device calibration LUTs, kept next to the settings file in use."""
+    return Path(os.environ.get("RSI_CALIBRATION_DIR", config_file.parent / "calibration"))
+
 
 # Prime numbers are used to get a more random sampling of the image (to avoid sampling the same pixels in a row)
 PRIME_NUMBBERS = [
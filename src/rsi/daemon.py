@@ -0,0 +1,264 @@
+"""Run the sync without the GUI, controlled over a local socket."""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import logging
+import signal
+import socket
+import sys
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from rsi.config import CONFIG_FILE, CONTROL_SOCKET, PRIME_NUMBBERS
+from rsi.light_changer import LightChangerResolver
+from rsi.live import LiveReloader, sync_settings
+from rsi.metrics import start_metrics_server
+from rsi.sync import SyncEngine
+from rsi.types import Mode
+from rsi.utils_.ConfigurationManager import ConfigurationManager
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from rsi.metrics import MetricsServer
+
+logger = logging.getLogger(__name__)
+
+_ACCEPT_POLL = 0.5  # seconds between checks for shutdown while waiting for clients
+_CLIENT_TIMEOUT = 10  # seconds a client may wait for a reply
+_MAX_REQUEST = 65536  # bytes in one request line
+
+
+class SyncDaemon:
+    """
+    Run the capture-to-light pipeline headless, for always-on machines.
+
+    Nothing from the GUI is imported. The sync follows the configuration
+    file just like the GUI does, and clients drive it over a Unix domain
+    socket, one JSON object per line each way::
+
+        {"command": "precision", "value": 30}
+        {"ok": true, "colour_precision": 30}
+
+    Commands are ``start``, ``stop``, ``precision`` (``value``), ``device``
+    (``mode``, optional ``settings`` for its section) and ``stats``.
+    Changes made over the socket are saved to the configuration, so they
+    outlive the daemon.
+    """
+
+    def __init__(self, config_manager: ConfigurationManager, socket_path: Path = CONTROL_SOCKET) -> None:
+        """Initialise sync daemon; nothing runs until `serve` is called."""
+        self.config_manager = config_manager
+        self.socket_path = socket_path
+        self.light_changer_resolver = LightChangerResolver(config_manager)
+        self.sync_engine = SyncEngine(self.light_changer_resolver.get_light_changer())
+        self.sync_engine.update_config(**sync_settings(config_manager))
+        self.live_reloader = LiveReloader(config_manager, self.light_changer_resolver, self.sync_engine)
+        self.commands: dict[str, Callable[..., dict[str, Any]]] = {
+            'start': self.start,
+            'stop': self.stop,
+            'precision': self.set_precision,
+            'device': self.set_device,
+            'stats': self.stats,
+        }
+        self._closed = threading.Event()
+        self._server: socket.socket | None = None
+        self._metrics: MetricsServer | None = None
+
+    # Commands
+
+    def start(self) -> dict[str, Any]:
+        """Start syncing."""
+        self.sync_engine.start()
+        return {'running': True}
+
+    def stop(self) -> dict[str, Any]:
+        """Stop syncing and return the lights to their default colour."""
+        self.sync_engine.stop()
+        return {'running': False}
+
+    def set_precision(self, value: int) -> dict[str, Any]:
+        """Set how many pixels are skipped when sampling the screen."""
+        precision = int(value)
+        if not 0 <= precision < len(PRIME_NUMBBERS):
+            msg = f"Precision must be between 0 and {len(PRIME_NUMBBERS) - 1}, not {precision}."
+            raise ValueError(msg)
+        self.config_manager.update('ADVANCED', {'color_precision': precision})
+        return {'colour_precision': self.sync_engine.config.colour_precision}
+
+    def set_device(self, mode: str, settings: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Switch to a device mode, first updating its config section with any given settings."""
+        mode = Mode(mode).value
+        if settings:
+            section = 'MULTI' if mode == Mode.MULTI else LightChangerResolver.MODE_SECTIONS[mode]
+            self.config_manager.update(section, settings)
+        self.config_manager.writeMode(mode)
+        return {'mode': self.config_manager.get_str('MODE', 'mode')}
+
+    def stats(self) -> dict[str, Any]:
+        """Sync counters and stage latencies, plus the health of each device in multi mode."""
+        return self.sync_engine.stats()
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Run one request and build its reply."""
+        arguments = dict(request)
+        name = arguments.pop('command', None)
+        command = self.commands.get(name)
+        if command is None:
+            return {'ok': False, 'error': f"Unknown command {name!r}, expected one of: {', '.join(self.commands)}."}
+        try:
+            return {'ok': True, **command(**arguments)}
+        except (TypeError, ValueError, KeyError, OSError) as err:
+            logger.warning("Command %s failed: %s", name, err)
+            return {'ok': False, 'error': str(err)}
+
+    # Serving
+
+    def _bind(self) -> socket.socket:
+        if self.socket_path.exists():
+            # A socket left behind by a crash refuses connections; a live daemon answers
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                stale = probe.connect_ex(str(self.socket_path)) != 0
+            if not stale:
+                msg = f"Another daemon is already listening on {self.socket_path}."
+                raise OSError(msg)
+            self.socket_path.unlink()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        self.socket_path.chmod(0o600)
+        server.listen()
+        server.settimeout(_ACCEPT_POLL)
+        return server
+
+    def _serve_client(self, connection: socket.socket) -> None:
+        with (
+            connection,
+            connection.makefile('rb') as reader,
+            connection.makefile('wb') as writer,
+            contextlib.suppress(OSError),
+        ):
+            while line := reader.readline(_MAX_REQUEST):
+                try:
+                    request = json.loads(line)
+                    reply = self.handle(request) if isinstance(request, dict) else {
+                        'ok': False, 'error': "Expected a JSON object.",
+                    }
+                except json.JSONDecodeError as err:
+                    reply = {'ok': False, 'error': f"Invalid JSON: {err}"}
+                writer.write(json.dumps(reply, default=str).encode() + b'\n')
+                writer.flush()
+
+    def serve(self, *, autostart: bool = True) -> None:
+        """Serve control requests until `close` is called, syncing from the start if ``autostart``."""
+        self._server = self._bind()
+        self.config_manager.watch()
+        self._metrics = start_metrics_server(self.config_manager, self.sync_engine.stats)
+        logger.info("Daemon listening on %s", self.socket_path)
+        if autostart:
+            self.sync_engine.start()
+        try:
+            while not self._closed.is_set():
+                try:
+                    connection, _ = self._server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(
+                    target=self._serve_client, args=(connection,), name='rsi-control', daemon=True,
+                ).start()
+        finally:
+            self._shutdown()
+
+    def close(self) -> None:
+        """Ask `serve` to return; safe to call from a signal handler."""
+        self._closed.set()
+
+    def _shutdown(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            with contextlib.suppress(FileNotFoundError):
+                self.socket_path.unlink()
+        if self._metrics is not None:
+            self._metrics.close()
+        self.sync_engine.close()
+        self.light_changer_resolver.close()
+        self.config_manager.close()
+        logger.info("Daemon stopped.")
+
+
+def send_command(request: dict[str, Any], socket_path: Path = CONTROL_SOCKET) -> dict[str, Any]:
+    """Send one request to a running daemon and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(_CLIENT_TIMEOUT)
+        client.connect(str(socket_path))
+        with client.makefile('rwb') as stream:
+            stream.write(json.dumps(request).encode() + b'\n')
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+def _setting(text: str) -> tuple[str, str]:
+    option, separator, value = text.partition('=')
+    if not separator:
+        msg = f"expected OPTION=VALUE, got {text!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return option.strip(), value.strip()
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='rsi', description="Sync lights to the screen without the GUI.")
+    parser.add_argument('--socket', type=Path, default=CONTROL_SOCKET, help="control socket path")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the sync daemon in the foreground")
+    run.add_argument('--config', type=Path, default=CONFIG_FILE, help="settings file, INI or TOML")
+    run.add_argument('--no-start', action='store_true', help="wait for a start command before syncing")
+
+    commands.add_parser('start', help="start syncing")
+    commands.add_parser('stop', help="stop syncing")
+    commands.add_parser('stats', help="show sync counters, stage latencies and device health")
+    precision = commands.add_parser('precision', help="set the sampling precision")
+    precision.add_argument('value', type=int)
+    device = commands.add_parser('device', help="switch device mode")
+    device.add_argument('mode', choices=[mode.value for mode in Mode])
+    device.add_argument('settings', nargs='*', type=_setting, metavar='OPTION=VALUE', help="device section options")
+    return parser
+
+
+def _run(config: Path, socket_path: Path, *, autostart: bool) -> None:
+    # Only the daemon sets up logging; commands just print the reply
+    from rsi.logger import setup_logging
+
+    setup_logging()
+    daemon = SyncDaemon(ConfigurationManager(config), socket_path)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.close())
+    daemon.serve(autostart=autostart)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the daemon, or send it a command and print the reply."""
+    args = _parser().parse_args(argv)
+    if args.command == 'run':
+        _run(args.config, args.socket, autostart=not args.no_start)
+        return 0
+
+    request: dict[str, Any] = {'command': args.command}
+    if args.command == 'precision':
+        request['value'] = args.value
+    elif args.command == 'device':
+        request.update(mode=args.mode, settings=dict(args.settings))
+    try:
+        reply = send_command(request, args.socket)
+    except OSError as err:
+        sys.stderr.write(f"rsi: cannot reach the daemon at {args.socket}: {err}\n")
+        return 1
+    sys.stdout.write(json.dumps(reply, indent=2) + '\n')
+    return 0 if reply.get('ok') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Filters between colour capture and the light changers."""
+
+from __future__ import annotations
+
+import math
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Protocol
+
+import numpy as np
+
+from rsi.colour_space import delta_e, rgb_to_lab
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class ChangeGate:
+    """
+    Suppress colours that are not visibly different from the last one sent.
+
+    Colours are compared in CIELAB, and one is let through when its ΔE from
+    the last sent colour exceeds ``threshold`` (about 2.3 is a just-noticeable
+    difference). For per-LED arrays the largest ΔE of any LED counts. When
+    ``keepalive`` is set, a colour is let through at least that often anyway,
+    so devices with a realtime timeout (WLED) do not fall back to their own
+    effects on a static screen.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 1.0,
+        keepalive: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialise change gate."""
+        self.threshold = threshold
+        self.keepalive = keepalive
+        self.clock = clock
+        self.sent = 0
+        self.suppressed = 0
+        self._last_lab: np.ndarray | None = None
+        self._last_sent_at = 0.0
+
+    def reset(self) -> None:
+        """Forget the last sent colour, so the next one always passes."""
+        self._last_lab = None
+
+    def should_send(self, colour: tuple[int, int, int] | np.ndarray) -> bool:
+        """Check whether a colour should be sent, counting it as sent or suppressed."""
+        lab = rgb_to_lab(np.asarray(colour, dtype=np.uint8))
+        now = self.clock()
+
+        changed = (
+            self._last_lab is None
+            or self._last_lab.shape != lab.shape
+            or float(np.max(delta_e(lab, self._last_lab))) > self.threshold
+        )
+        due = self.keepalive is not None and now - self._last_sent_at >= self.keepalive
+
+        if changed or due:
+            self._last_lab = lab
+            self._last_sent_at = now
+            self.sent += 1
+            return True
+
+        self.suppressed += 1
+        return False
+
+
+class TemporalFilter(Protocol):
+    """Protocol for smoothing a stream of colours over time."""
+
+    def apply(self, colour: np.ndarray, timestamp: float) -> np.ndarray:
+        """Filter the next colour, taken at ``timestamp`` seconds."""
+
+    def reset(self) -> None:
+        """Forget the colour history."""
+
+
+class SmoothingMode(str, Enum):
+    """Temporal filter applied to captured colours."""
+
+    NONE = "none"
+    EMA = "ema"
+    ONE_EURO = "one_euro"
+
+
+def _smoothing_factor(cutoff: float | np.ndarray, elapsed: float) -> float | np.ndarray:
+    """Get the low-pass factor for a cutoff frequency (Hz) over an elapsed time."""
+    tau = 1 / (2 * math.pi * cutoff)
+    return 1 / (1 + tau / elapsed)
+
+
+class EMAFilter:
+    """
+    Exponential moving average with a time constant.
+
+    The weight of each new colour depends on the time since the previous
+    one, so smoothing stays the same when the frame rate changes.
+    """
+
+    def __init__(self, time_constant: float = 0.1) -> None:
+        """Initialise EMA filter with a time constant in seconds."""
+        self.time_constant = time_constant
+        self._value: np.ndarray | None = None
+        self._timestamp = 0.0
+
+    def apply(self, colour: np.ndarray, timestamp: float) -> np.ndarray:
+        """Filter the next colour."""
+        colour = np.asarray(colour, dtype=np.float64)
+        if self._value is None or self._value.shape != colour.shape or self.time_constant <= 0:
+            self._value = colour
+        else:
+            alpha = 1 - math.exp(-max(timestamp - self._timestamp, 0.0) / self.time_constant)
+            self._value = self._value + alpha * (colour - self._value)
+        self._timestamp = timestamp
+        return self._value
+
+    def reset(self) -> None:
+        """Forget the colour history."""
+        self._value = None
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al., 2012).
+
+    Slow changes are smoothed heavily to remove flicker, while the cutoff
+    rises with the speed of change so fast scene cuts come through with
+    little lag. Every channel of every LED is filtered independently.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.05, derivative_cutoff: float = 1.0) -> None:
+        """Initialise One Euro filter; cutoffs are in Hz, ``beta`` scales with colour speed."""
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+        self._value: np.ndarray | None = None
+        self._derivative: np.ndarray | None = None
+        self._timestamp = 0.0
+
+    def apply(self, colour: np.ndarray, timestamp: float) -> np.ndarray:
+        """Filter the next colour."""
+        colour = np.asarray(colour, dtype=np.float64)
+        elapsed = timestamp - self._timestamp
+        self._timestamp = timestamp
+
+        if self._value is None or self._derivative is None or self._value.shape != colour.shape or elapsed <= 0:
+            self._value = colour
+            self._derivative = np.zeros_like(colour)
+            return self._value
+
+        derivative = (colour - self._value) / elapsed
+        self._derivative += _smoothing_factor(self.derivative_cutoff, elapsed) * (derivative - self._derivative)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._derivative)
+        self._value = self._value + _smoothing_factor(cutoff, elapsed) * (colour - self._value)
+        return self._value
+
+    def reset(self) -> None:
+        """Forget the colour history."""
+        self._value = None
+        self._derivative = None
+
+
+def make_temporal_filter(mode: SmoothingMode, strength: float | None = None) -> TemporalFilter | None:
+    """
+    Create a temporal filter for a smoothing mode.
+
+    ``strength`` is the EMA time constant in seconds, or the One Euro
+    filter's minimum cutoff frequency in Hz. It defaults to the filter's own default.
+    """
+    if mode == SmoothingMode.EMA:
+        return EMAFilter() if strength is None else EMAFilter(strength)
+    if mode == SmoothingMode.ONE_EURO:
+        return OneEuroFilter() if strength is None else OneEuroFilter(min_cutoff=strength)
+    return None
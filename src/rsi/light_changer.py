@@ -1,147 +1,201 @@
-"""Light changer implementations."""
+"""Pick, build and update the light changer for the configured mode."""
 
 from __future__ import annotations
 
-import contextlib
+import importlib
 import logging
-import socket
-import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, ClassVar
 
-import requests
-import yeelight  # type: ignore[import-untyped]
+import numpy as np
 
-from rsi.colour import rgb_to_hsv
+from rsi.calibration import CalibratedLightChanger, Calibration, load_lut
+from rsi.composite import CompositeLightChanger
+from rsi.config import calibration_dir
 from rsi.types import LightChanger, Mode
 
 if TYPE_CHECKING:
+    import configparser
+
     from rsi.utils_.ConfigurationManager import ConfigurationManager
 
 logger = logging.getLogger(__name__)
 
 
-class HALightChanger:
-    """Manage Home Assistant lights."""
-
-    def __init__(self, home_assistant_ip: str, home_assistant_port: str | int) -> None:
-        """Initialise Home Assistant light manager."""
-        self.home_assistant_ip = home_assistant_ip
-        self.home_assistant_port = home_assistant_port
-        self.timeout = 10  # seconds
-
-    def change_colour(self, red: int, green: int, blue: int) -> None:
-        """Set Home Assistant light colour."""
-        hue, saturation, value = rgb_to_hsv(red, green, blue)
-        requests.post(
-            f"http://{self.home_assistant_ip}:{self.home_assistant_port}/api/webhook/hsv-webhook"
-            f"?H={hue}&S={saturation}&V={value}",
-            timeout=self.timeout,
-        )
-
-    def default_colour(self) -> None:
-        """Set Home Assistant light colour to default."""
-        requests.post(
-            f"http://{self.home_assistant_ip}:{self.home_assistant_port}/api/webhook/white-light",
-            timeout=self.timeout,
-        )
-
-
-class WLEDLightChanger:
-    """Manage WLED lights."""
-
-    def __init__(self, wled_ip: str) -> None:
-        """Initialise WLED light manager."""
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.protocol = 1
-        self.timeout = 1
-        self.MAX_LED_COUNT = 256
-        self.UDP_IP_ADDRESS = wled_ip
-        self.UDP_PORT_NO = 21324
-
-    def change_colour(self, red: int, green: int, blue: int) -> None:
-        """Set WLED light colour."""
-        colour = (red, green, blue)
-        logger.info("Changing color to %s", colour)
-
-        colours = [colour for _ in range(self.MAX_LED_COUNT)]
-
-        # Convert to WARLS Protocol
-        data = bytearray([self.protocol, self.timeout])
-        for idx, colour_ in enumerate(colours):
-            data += bytearray([idx, *colour_])
-
-        self.sock.sendto(data, (self.UDP_IP_ADDRESS, self.UDP_PORT_NO))
-        logger.debug("Sending data to %s:%d", self.UDP_IP_ADDRESS, self.UDP_PORT_NO)
-
-    def default_colour(self) -> None:
-        """Set WLED light colour to default."""
-        self.change_colour(255, 255, 255)
-
-
-class YeeLightChanger:
-    """Manage Yee lights."""
-
-    def __init__(self, yee_light_ip: str) -> None:
-        """Initialise Yee light manager."""
-        # Connection taken from https://hyperion-project.org/forum/index.php?thread/529-xiaomi-rgb-bulb-simple-udp-server-solution/
-        self.yee_light_ip = yee_light_ip
-        self.bulb = yeelight.Bulb(self.yee_light_ip)
-        try:
-            self.bulb.turn_on()
-        except OSError:
-            logger.exception("Error turning on Yee bulb")
-        self.bulb.effect = "smooth"  # can be "sudden" or "smooth"
-        self.bulb.duration = 150  # miliseconds of duration of effect, ignored in "sudden" effect. MINIMUM 30!
-
-        # Stop/Start music mode, bypasses lamp rate limits, ensures that previous sockets close before starting
-        with contextlib.suppress(yeelight.BulbException):
-            self.bulb.stop_music()
-        time.sleep(1)
-        while True:
-            try:
-                self.bulb.start_music()
-                break
-            except yeelight.BulbException:
-                break
-        time.sleep(1)
-
-    def change_colour(self, red: int, green: int, blue: int) -> None:
-        """Set Yee light colour."""
-        hsv = rgb_to_hsv(red, green, blue)
-        try:
-            self.bulb.set_hsv(*hsv)
-        except yeelight.BulbException:
-            logger.exception("Error when attempting to set bulb colour")
-
-    def default_colour(self) -> None:
-        """Set Yee light colour to default."""
-        try:
-            self.bulb.set_color_temp(4700)
-        except yeelight.BulbException:
-            logger.exception("Error when attempting to set bulb to default settings")
+def mean_colour(colours: np.ndarray) -> tuple[int, int, int]:
+    """Collapse an ``(N, 3)`` RGB array into a single colour for single-light devices."""
+    red, green, blue = np.rint(colours.mean(axis=0)).astype(int).tolist()
+    return red, green, blue
 
 
 class LightChangerResolver:
     """Resolve light changer."""
 
+    # Which backend a config section configures, unless it names one with a ``mode`` option
+    SECTION_MODES: ClassVar[dict[str, Mode]] = {
+        'HOME ASSISTANT': Mode.HOME_ASSISTANT,
+        'YEELIGHT': Mode.YEELIGHT,
+        'WLED': Mode.WLED,
+        'DDP': Mode.DDP,
+    }
+    # Keyed by value, since the mode is read from config as a plain string
+    MODE_SECTIONS: ClassVar[dict[str, str]] = {
+        Mode.HOME_ASSISTANT.value: 'HOME ASSISTANT',
+        Mode.HOME_ASSISTANT_WS.value: 'HOME ASSISTANT',
+        Mode.YEELIGHT.value: 'YEELIGHT',
+        Mode.WLED.value: 'WLED',
+        Mode.DDP.value: 'DDP',
+    }
+
+    # Where each backend lives, imported only once a device uses it
+    BACKENDS: ClassVar[dict[str, tuple[str, str]]] = {
+        Mode.HOME_ASSISTANT.value: ('rsi.light_homeassistant', 'HALightChanger'),
+        Mode.HOME_ASSISTANT_WS.value: ('rsi.light_homeassistant_ws', 'HAWebSocketLightChanger'),
+        Mode.YEELIGHT.value: ('rsi.light_yeelight', 'YeeLightChanger'),
+        Mode.WLED.value: ('rsi.light_wled', 'WLEDLightChanger'),
+        Mode.DDP.value: ('rsi.light_wled', 'DDPLightChanger'),
+    }
+
     def __init__(self, config_manager: ConfigurationManager) -> None:
         """Initialise changer resolver."""
         self.config_manager = config_manager
+        # The light changer in use and the effective config it was built from
+        self._light_changer: LightChanger | None = None
+        self._key: tuple[Any, ...] | None = None
 
     def get_light_changer(self) -> LightChanger:
-        """Get a light changer for the current mode."""
+        """
+        Get a light changer for the current mode.
+
+        The same instance is returned for as long as the settings it was
+        built from stay the same, so callers share one set of sockets and
+        connections. When the settings change, a new light changer is built
+        and the old one is closed.
+        """
         config = self.config_manager.read()
+        key = self._config_key(config)
+        if self._light_changer is not None and key == self._key:
+            return self._light_changer
+
+        mode = config['MODE']['mode']
+        if mode == Mode.MULTI:
+            light_changer: LightChanger = self._make_composite(config)
+        elif mode in self.MODE_SECTIONS:
+            section = config[self.MODE_SECTIONS[mode]]
+            light_changer = self._calibrate(section, self._make_light_changer(mode, section))
+        else:
+            msg = f"Unsupported mode '{mode}'."
+            raise ValueError(msg)
+
+        if self._light_changer is not None:
+            self._light_changer.close()
+        self._light_changer, self._key = light_changer, key
+        return light_changer
+
+    def close(self) -> None:
+        """Close the light changer in use."""
+        if self._light_changer is not None:
+            self._light_changer.close()
+        self._light_changer = self._key = None
+
+    def _device_names(self, config: configparser.ConfigParser) -> list[str]:
+        """Names of the device sections listed in ``[MULTI] devices``."""
+        return [name.strip() for name in config['MULTI']['devices'].split(',') if name.strip()]
+
+    def _config_key(self, config: configparser.ConfigParser) -> tuple[Any, ...]:
+        """Everything a light changer for the current mode is built from."""
         mode = config['MODE']['mode']
-        if mode == Mode.HOME_ASSISTANT:
-            home_assistant_ip = config['HOME ASSISTANT']['home_assistant_ip']
-            home_assistant_port = config['HOME ASSISTANT']['home_assistant_port']
-            return HALightChanger(home_assistant_ip, home_assistant_port)
-        if mode == Mode.YEELIGHT:
-            yeelight_ip = config['YEELIGHT']['yeelight_ip']
-            return YeeLightChanger(yeelight_ip)
-        if mode == Mode.WLED:
-            wled_ip = config['WLED']['wled_ip']
-            return WLEDLightChanger(wled_ip)
-
-        msg = f"Unsupported mode '{mode}'."
-        raise ValueError(msg)
+        if mode == Mode.MULTI:
+            names = self._device_names(config) if config.has_section('MULTI') else []
+        else:
+            names = [self.MODE_SECTIONS.get(mode, '')]
+        return mode, tuple((name, tuple(config[name].items()) if config.has_section(name) else ()) for name in names)
+
+    def _backend(self, mode: str) -> type[Any] | None:
+        """Get the light changer class of a mode, importing its module on first use."""
+        if mode not in self.BACKENDS:
+            return None
+        module, name = self.BACKENDS[mode]
+        return getattr(importlib.import_module(module), name)
+
+    def _make_light_changer(self, mode: str, section: configparser.SectionProxy) -> LightChanger:
+        """Create the light changer for one device from its config section."""
+        backend = self._backend(mode)
+        if backend is None:
+            msg = f"Unsupported mode '{mode}' for device '{section.name}'."
+            raise ValueError(msg)
+        return backend.from_config(section)
+
+    def apply_changes(self, light_changer: LightChanger, sections: set[str]) -> LightChanger:
+        """
+        Bring a light changer in line with changed config sections.
+
+        Devices whose sections did not change are left alone. A changed
+        device is reconfigured in place where its backend supports it (a new
+        address for a UDP socket, say) and rebuilt otherwise. Returns the
+        light changer to use from now on, which is a new one only if the
+        mode or the list of devices changed.
+        """
+        config = self.config_manager.read()
+        mode = config['MODE']['mode']
+        if 'MODE' in sections or (mode == Mode.MULTI and 'MULTI' in sections):
+            return self.get_light_changer()
+        if isinstance(light_changer, CompositeLightChanger):
+            for worker in light_changer.workers:
+                if worker.name in sections:
+                    section = config[worker.name]
+                    device_mode = section.get('mode', self.SECTION_MODES.get(worker.name, ''))
+                    device, rebuilt = self._update_device(worker.light_changer, device_mode, section)
+                    # The worker closes a rebuilt device's old light changer once it is off it
+                    light_changer.replace(
+                        worker.name, device, section.getfloat('max_rate', fallback=0), close_previous=rebuilt,
+                    )
+        else:
+            section_name = self.MODE_SECTIONS.get(mode)
+            if section_name in sections:
+                device, rebuilt = self._update_device(light_changer, mode, config[section_name])
+                if rebuilt:
+                    light_changer.close()
+                light_changer = device
+        self._light_changer, self._key = light_changer, self._config_key(config)
+        return light_changer
+
+    def _update_device(
+        self,
+        light_changer: LightChanger,
+        mode: str,
+        section: configparser.SectionProxy,
+    ) -> tuple[LightChanger, bool]:
+        """Reconfigure a device in place if its backend allows, or build a new one; say whether it was rebuilt."""
+        device = light_changer.light_changer if isinstance(light_changer, CalibratedLightChanger) else light_changer
+        reconfigure = getattr(device, 'reconfigure', None)
+        if type(device) is self._backend(mode) and reconfigure is not None and reconfigure(section):
+            logger.info("Reconfigured %s in place", section.name)
+            return self._calibrate(section, device), False
+        logger.info("Rebuilding %s", section.name)
+        return self._calibrate(section, self._make_light_changer(mode, section)), True
+
+    def _calibrate(self, section: configparser.SectionProxy, light_changer: LightChanger) -> LightChanger:
+        """Wrap a device in its calibration, if its section sets one."""
+        calibration = Calibration.from_config(section)
+        if calibration.identity:
+            return light_changer
+        lut = load_lut(calibration, calibration_dir(self.config_manager.path), section.name)
+        return CalibratedLightChanger(light_changer, lut)
+
+    def _make_composite(self, config: configparser.ConfigParser) -> CompositeLightChanger:
+        """Create one light changer per section listed in ``[MULTI] devices``."""
+        devices: dict[str, LightChanger] = {}
+        max_rates: dict[str, float] = {}
+        try:
+            for name in self._device_names(config):
+                section = config[name]
+                mode = section.get('mode', self.SECTION_MODES.get(name, ''))
+                devices[name] = self._make_light_changer(mode, section)
+                devices[name] = self._calibrate(section, devices[name])
+                max_rates[name] = section.getfloat('max_rate', fallback=0)
+        except BaseException:
+            # Devices already built hold sockets and worker threads
+            for light_changer in devices.values():
+                light_changer.close()
+            raise
+        return CompositeLightChanger(devices, max_rates)
@@ -0,0 +1,150 @@
+"""Home Assistant light changer over webhooks."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rsi.colour import rgb_to_hsv
+from rsi.light_changer import mean_colour
+from rsi.logger import RateLimitedLog
+from rsi.stats import LatencyStats
+from rsi.sync import LatestSlot
+
+if TYPE_CHECKING:
+    import configparser
+
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_HA_POLL_INTERVAL = 0.5  # seconds
+
+
+class HALightChanger:
+    """
+    Manage Home Assistant lights.
+
+    Colours are posted from background workers over a pooled keep-alive
+    session, at most ``max_in_flight`` at a time. While the server is busy,
+    newer colours replace pending ones, so only the latest is sent. Posts
+    are numbered; if an older one completes after a newer one, the newer
+    colour is sent again so the light never stays on a stale colour.
+    """
+
+    def __init__(self, home_assistant_ip: str, home_assistant_port: str | int, max_in_flight: int = 2) -> None:
+        """Initialise Home Assistant light manager."""
+        self.home_assistant_ip = home_assistant_ip
+        self.home_assistant_port = home_assistant_port
+        self.timeout = 10  # seconds
+        self.keepalive = None
+        self.base_url = f"http://{self.home_assistant_ip}:{self.home_assistant_port}/api/webhook"
+        self.max_in_flight = max_in_flight
+        self.latency = LatencyStats()
+        self._post_errors = RateLimitedLog(logger)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount('http://', adapter)
+
+        self._pending: LatestSlot[dict[str, float]] = LatestSlot()
+        self._idle = threading.Condition()
+        self._in_flight = 0
+        self._sequence = 0
+        self._applied: tuple[int, dict[str, float]] | None = None
+        self._closed = threading.Event()
+        self._workers: list[threading.Thread] = []
+
+    @classmethod
+    def from_config(cls: type[HALightChanger], section: configparser.SectionProxy) -> HALightChanger:
+        """Create a webhook light changer from the ``[HOME ASSISTANT]`` section."""
+        return cls(section['home_assistant_ip'], section['home_assistant_port'])
+
+    def _start_workers(self) -> None:
+        self._workers = [
+            threading.Thread(target=self._post_loop, name=f'rsi-homeassistant-{idx}', daemon=True)
+            for idx in range(self.max_in_flight)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _post_loop(self) -> None:
+        while not self._closed.is_set():
+            with self._idle:
+                params = self._pending.take(0)
+                if params is None:
+                    self._idle.wait(_HA_POLL_INTERVAL)
+                    continue
+                self._in_flight += 1
+                self._sequence += 1
+                sequence = self._sequence
+            start = time.perf_counter()
+            applied = False
+            try:
+                response = self.session.post(f"{self.base_url}/hsv-webhook", params=params, timeout=self.timeout)
+            except requests.RequestException:
+                self.latency.record_error()
+                self._post_errors.exception("Posting colour to Home Assistant failed")
+            else:
+                applied = response.ok
+                if applied:
+                    self.latency.record(time.perf_counter() - start)
+                else:
+                    self.latency.record_error()
+                    self._post_errors.warning(
+                        "Home Assistant rejected colour: %s %s", response.status_code, response.reason,
+                    )
+            finally:
+                with self._idle:
+                    self._in_flight -= 1
+                    if applied:
+                        self._settle(sequence, params)
+                    self._idle.notify_all()
+
+    def _settle(self, sequence: int, params: dict[str, float]) -> None:
+        # Called holding ``_idle``; a stale post that lands last re-queues the newest applied colour
+        if self._applied is None or sequence > self._applied[0]:
+            self._applied = (sequence, params)
+        elif not self._pending.full:
+            self._pending.put(self._applied[1])
+
+    def change_colour(self, red: int, green: int, blue: int) -> None:
+        """Queue a Home Assistant light colour, replacing any colour not yet sent."""
+        if not self._workers:
+            self._start_workers()
+        hue, saturation, value = rgb_to_hsv(red, green, blue)
+        with self._idle:
+            self._pending.put({'H': hue, 'S': saturation, 'V': value})
+            self._idle.notify()
+
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Set Home Assistant light colour to the mean of per-LED colours."""
+        self.change_colour(*mean_colour(colours))
+
+    def reconfigure(self, section: configparser.SectionProxy) -> bool:
+        """Point the pooled session at a changed Home Assistant address."""
+        self.home_assistant_ip = section['home_assistant_ip']
+        self.home_assistant_port = section['home_assistant_port']
+        self.base_url = f"http://{self.home_assistant_ip}:{self.home_assistant_port}/api/webhook"
+        return True
+
+    def default_colour(self) -> None:
+        """Set Home Assistant light colour to default, after any colour already being sent."""
+        with self._idle:
+            self._pending.clear()
+            self._idle.wait_for(lambda: not self._in_flight, self.timeout)
+        self.session.post(f"{self.base_url}/white-light", timeout=self.timeout)
+
+    def close(self) -> None:
+        """Stop the workers and close the HTTP session."""
+        self._closed.set()
+        with self._idle:
+            self._idle.notify_all()
+        for worker in self._workers:
+            worker.join(self.timeout)
+        self.session.close()
@@ -0,0 +1,258 @@
+"""Home Assistant light changer over the WebSocket API."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import select
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import websocket
+
+from rsi.colour import rgb_to_hsv
+from rsi.light_changer import mean_colour
+from rsi.logger import RateLimitedLog
+from rsi.stats import LatencyStats
+from rsi.sync import LatestSlot
+
+if TYPE_CHECKING:
+    import configparser
+
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WS_POLL = 0.5  # seconds
+_RECONNECT_MIN = 1  # seconds
+_RECONNECT_MAX = 30  # seconds
+# What a lost or broken connection raises; ValueError covers malformed JSON
+_CONNECTION_ERRORS = (OSError, ValueError, websocket.WebSocketException)
+
+
+class HAWebSocketLightChanger:
+    """
+    Manage Home Assistant lights over a persistent WebSocket API session.
+
+    A background worker keeps one authenticated connection open and sends
+    ``light.turn_on`` service calls without waiting for each result, up to
+    ``max_in_flight`` unanswered calls. Beyond that, newer colours replace
+    the pending one. Lost connections are re-established with backoff, and
+    a default colour Home Assistant had not confirmed is sent again.
+    """
+
+    def __init__(
+        self,
+        home_assistant_ip: str,
+        home_assistant_port: str | int,
+        access_token: str,
+        light_entity_id: str,
+        transition: float = 0.15,
+        max_in_flight: int = 4,
+    ) -> None:
+        """Initialise Home Assistant WebSocket light manager."""
+        self.url = f"ws://{home_assistant_ip}:{home_assistant_port}/api/websocket"
+        self.access_token = access_token
+        self.light_entity_id = light_entity_id
+        self.transition = transition  # seconds
+        self.max_in_flight = max_in_flight
+        self.timeout = 10  # seconds
+        self.keepalive = None
+        self.latency = LatencyStats()
+        self._rejections = RateLimitedLog(logger)
+        self.connected = threading.Event()
+
+        self._pending: LatestSlot[dict[str, Any]] = LatestSlot()
+        self._default_requested = threading.Event()
+        self._default_confirmed = threading.Event()
+        self._closed = threading.Event()
+        # Lets change_colour wake the worker while it waits on the socket; neither end may block the caller
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.settimeout(0)
+        self._wake_writer.settimeout(0)
+        self._worker: threading.Thread | None = None
+
+        # Per-connection pipeline state, owned by the worker
+        self._message_id = 0
+        self._sent_at: dict[int, float] = {}
+        self._default_id: int | None = None
+
+    @classmethod
+    def from_config(cls: type[HAWebSocketLightChanger], section: configparser.SectionProxy) -> HAWebSocketLightChanger:
+        """Create a WebSocket light changer from the ``[HOME ASSISTANT]`` section."""
+        return cls(
+            section['home_assistant_ip'],
+            section['home_assistant_port'],
+            section.get('access_token', ''),
+            section.get('light_entity_id', ''),
+            section.getfloat('transition', fallback=0.15),
+        )
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='rsi-homeassistant-ws', daemon=True)
+            self._worker.start()
+
+    def _wake(self) -> None:
+        # A full buffer already holds a wake-up for the worker
+        with contextlib.suppress(BlockingIOError):
+            self._wake_writer.send(b'\0')
+
+    def _drain_wake(self) -> None:
+        with contextlib.suppress(BlockingIOError):
+            while self._wake_reader.recv(4096):
+                pass
+
+    def _authenticate(self, ws: websocket.WebSocket) -> None:
+        if json.loads(ws.recv()).get('type') != 'auth_required':
+            msg = "Unexpected Home Assistant greeting."
+            raise ConnectionError(msg)
+        ws.send(json.dumps({'type': 'auth', 'access_token': self.access_token}))
+        reply = json.loads(ws.recv())
+        if reply.get('type') != 'auth_ok':
+            msg = f"Home Assistant authentication failed: {reply.get('message', reply.get('type'))}"
+            raise ConnectionError(msg)
+
+    def _connect(self) -> websocket.WebSocket:
+        ws = websocket.create_connection(self.url, self.timeout)
+        try:
+            self._authenticate(ws)
+        except BaseException:
+            ws.close()
+            raise
+        return ws
+
+    def _run(self) -> None:
+        backoff = _RECONNECT_MIN
+        while not self._closed.is_set():
+            try:
+                ws = self._connect()
+            except _CONNECTION_ERRORS as err:
+                logger.warning("Connecting to Home Assistant failed (%s), retrying in %.0f s", err, backoff)
+                self._closed.wait(backoff)
+                self._drain_wake()
+                backoff = min(backoff * 2, _RECONNECT_MAX)
+                continue
+
+            backoff = _RECONNECT_MIN
+            self.connected.set()
+            logger.info("Connected to Home Assistant at %s", self.url)
+            try:
+                self._session(ws)
+            except _CONNECTION_ERRORS as err:
+                logger.warning("Home Assistant connection lost (%s), reconnecting", err)
+            finally:
+                self.connected.clear()
+                ws.close()
+                # A default colour lost with the connection goes out again on the next one
+                if self._default_id is not None and not self._default_confirmed.is_set():
+                    self._default_requested.set()
+
+    def _send_next(self, ws: websocket.WebSocket) -> None:
+        """Send the default colour, or the newest pending colour if the pipeline has room."""
+        if self._default_requested.is_set():
+            self._default_requested.clear()
+            service_data: dict[str, Any] | None = {'color_temp_kelvin': 4000, 'brightness': 255}
+            self._default_id = self._message_id + 1
+        elif len(self._sent_at) < self.max_in_flight:
+            service_data = self._pending.take(0)
+        else:
+            service_data = None
+
+        if service_data is None:
+            return
+        self._message_id += 1
+        ws.send(json.dumps({
+            'id': self._message_id,
+            'type': 'call_service',
+            'domain': 'light',
+            'service': 'turn_on',
+            'service_data': service_data,
+            'target': {'entity_id': self.light_entity_id},
+        }))
+        self._sent_at[self._message_id] = time.perf_counter()
+
+    def _wait_for_message(self, ws: websocket.WebSocket) -> bool:
+        """Wait for a reply or a new colour; return whether a reply can be read."""
+        # The client reads frame by frame, so nothing is left buffered past the socket
+        can_send = len(self._sent_at) < self.max_in_flight and (
+            self._pending.full or self._default_requested.is_set()
+        )
+        readable, _, _ = select.select([ws.sock, self._wake_reader], [], [], 0 if can_send else _WS_POLL)
+        if self._wake_reader in readable:
+            self._drain_wake()
+        if ws.sock in readable:
+            return True
+        if self._sent_at and time.perf_counter() - min(self._sent_at.values()) > self.timeout:
+            msg = "Home Assistant stopped answering."
+            raise TimeoutError(msg)
+        return False
+
+    def _handle_message(self, message: dict[str, Any]) -> None:
+        start = self._sent_at.pop(message.get('id'), None)  # type: ignore[arg-type]
+        if message.get('type') != 'result' or start is None:
+            return
+        if message.get('success'):
+            self.latency.record(time.perf_counter() - start)
+            if message['id'] == self._default_id:
+                self._default_confirmed.set()
+        else:
+            self.latency.record_error()
+            self._rejections.warning("Home Assistant rejected a colour: %s", message.get('error'))
+
+    def _receive(self, ws: websocket.WebSocket) -> dict[str, Any] | None:
+        """Read one message, or None for a ping or pong, which the client answers itself."""
+        opcode, frame = ws.recv_data_frame(control_frame=True)
+        if opcode == websocket.ABNF.OPCODE_CLOSE:
+            msg = "Home Assistant closed the connection."
+            raise websocket.WebSocketConnectionClosedException(msg)
+        if opcode != websocket.ABNF.OPCODE_TEXT:
+            return None
+        return json.loads(frame.data)
+
+    def _session(self, ws: websocket.WebSocket) -> None:
+        self._message_id = 0
+        self._sent_at = {}
+        self._default_id = None
+        while not self._closed.is_set():
+            self._send_next(ws)
+            if self._wait_for_message(ws) and (message := self._receive(ws)) is not None:
+                self._handle_message(message)
+
+    def change_colour(self, red: int, green: int, blue: int) -> None:
+        """Queue a Home Assistant light colour, replacing any colour not yet sent."""
+        self._ensure_worker()
+        hue, saturation, value = rgb_to_hsv(red, green, blue)
+        self._pending.put({
+            'hs_color': [hue, saturation],
+            'brightness': round(value * 2.55),
+            'transition': self.transition,
+        })
+        self._wake()
+
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Set Home Assistant light colour to the mean of per-LED colours."""
+        self.change_colour(*mean_colour(colours))
+
+    def default_colour(self) -> None:
+        """Set Home Assistant light colour to default, waiting for Home Assistant to confirm it."""
+        self._ensure_worker()
+        self._pending.clear()
+        self._default_confirmed.clear()
+        self._default_requested.set()
+        self._wake()
+        if not self._default_confirmed.wait(self.timeout):
+            msg = "Home Assistant did not confirm the default colour."
+            raise TimeoutError(msg)
+
+    def close(self) -> None:
+        """Stop the worker and close the connection."""
+        self._closed.set()
+        self._wake()
+        if self._worker is not None:
+            self._worker.join(self.timeout)
+        self._wake_reader.close()
+        self._wake_writer.close()
@@ -0,0 +1,135 @@
+"""UDP pixel light changers: WLED realtime and DDP."""
+
+from __future__ import annotations
+
+import logging
+import socket
+from typing import TYPE_CHECKING
+
+from rsi.packets import DDP_PORT, DDPPacketBuilder, WLEDPacketBuilder
+
+if TYPE_CHECKING:
+    import configparser
+
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class WLEDLightChanger:
+    """Manage WLED lights."""
+
+    def __init__(self, wled_ip: str, led_count: int = 256) -> None:
+        """Initialise WLED light manager."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.timeout = 1
+        self.keepalive = self.timeout / 2  # WLED leaves realtime mode after `timeout` seconds without data
+        self.led_count = led_count
+        self.UDP_IP_ADDRESS = wled_ip
+        self.UDP_PORT_NO = 21324
+        self.packet_builder = self._make_packet_builder(led_count)
+
+    @classmethod
+    def from_config(cls: type[WLEDLightChanger], section: configparser.SectionProxy) -> WLEDLightChanger:
+        """Create a WLED light changer from a config section."""
+        return cls(section['wled_ip'], section.getint('led_count', fallback=256))
+
+    def _make_packet_builder(self, led_count: int) -> WLEDPacketBuilder:
+        packet_builder = WLEDPacketBuilder(led_count, self.timeout)
+        logger.info(
+            "Sending %d LEDs to %s:%d as %d %s packet(s)",
+            led_count, self.UDP_IP_ADDRESS, self.UDP_PORT_NO, len(packet_builder.packets), packet_builder.protocol.name,
+        )
+        return packet_builder
+
+    def _send(self, packets: list[memoryview]) -> None:
+        address = (self.UDP_IP_ADDRESS, self.UDP_PORT_NO)
+        for packet in packets:
+            self.sock.sendto(packet, address)
+
+    def change_colour(self, red: int, green: int, blue: int) -> None:
+        """Set WLED light colour."""
+        if self.packet_builder.led_count != self.led_count:
+            self.packet_builder = self._make_packet_builder(self.led_count)
+        self._send(self.packet_builder.fill((red, green, blue)))
+
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Set WLED per-LED colours."""
+        if self.packet_builder.led_count != len(colours):
+            self.packet_builder = self._make_packet_builder(len(colours))
+        self._send(self.packet_builder.build(colours))
+
+    def reconfigure(self, section: configparser.SectionProxy) -> bool:
+        """Send to a changed address or strip length, keeping the socket."""
+        self.UDP_IP_ADDRESS = section['wled_ip']
+        self.led_count = section.getint('led_count', fallback=256)
+        return True
+
+    def default_colour(self) -> None:
+        """Set WLED light colour to default."""
+        self.change_colour(255, 255, 255)
+
+    def close(self) -> None:
+        """Close the UDP socket."""
+        self.sock.close()
+
+
+class DDPLightChanger:
+    """
+    Manage lights over the Distributed Display Protocol.
+
+    Suited to installations with more LEDs than WLED's realtime packets
+    handle well: every frame is split into 480-pixel packets with byte
+    offsets, and the receiver shows it when the last (push) packet arrives.
+    """
+
+    def __init__(self, ddp_ip: str, led_count: int = 256, port: int = DDP_PORT) -> None:
+        """Initialise DDP light manager."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.keepalive = 1.0  # Receivers such as WLED leave realtime mode after a few idle seconds
+        self.led_count = led_count
+        self.address = (ddp_ip, port)
+        self.packet_builder = self._make_packet_builder(led_count)
+
+    @classmethod
+    def from_config(cls: type[DDPLightChanger], section: configparser.SectionProxy) -> DDPLightChanger:
+        """Create a DDP light changer from a config section."""
+        return cls(section['ddp_ip'], section.getint('led_count', fallback=256))
+
+    def _make_packet_builder(self, led_count: int) -> DDPPacketBuilder:
+        packet_builder = DDPPacketBuilder(led_count)
+        logger.info(
+            "Sending %d LEDs to %s:%d as %d DDP packet(s)",
+            led_count, *self.address, len(packet_builder.packets),
+        )
+        return packet_builder
+
+    def _send(self, packets: list[memoryview]) -> None:
+        for packet in packets:
+            self.sock.sendto(packet, self.address)
+
+    def change_colour(self, red: int, green: int, blue: int) -> None:
+        """Set every DDP pixel to one colour."""
+        if self.packet_builder.led_count != self.led_count:
+            self.packet_builder = self._make_packet_builder(self.led_count)
+        self._send(self.packet_builder.fill((red, green, blue)))
+
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Set DDP per-pixel colours."""
+        if self.packet_builder.led_count != len(colours):
+            self.packet_builder = self._make_packet_builder(len(colours))
+        self._send(self.packet_builder.build(colours))
+
+    def reconfigure(self, section: configparser.SectionProxy) -> bool:
+        """Send to a changed address or pixel count, keeping the socket."""
+        self.address = (section['ddp_ip'], self.address[1])
+        self.led_count = section.getint('led_count', fallback=256)
+        return True
+
+    def default_colour(self) -> None:
+        """Set DDP pixels to white."""
+        self.change_colour(255, 255, 255)
+
+    def close(self) -> None:
+        """Close the UDP socket."""
+        self.sock.close()
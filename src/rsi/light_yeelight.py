@@ -0,0 +1,150 @@
+"""Yeelight light changer."""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import yeelight  # type: ignore[import-untyped]
+
+from rsi.colour import rgb_to_hsv
+from rsi.light_changer import mean_colour
+from rsi.stats import LatencyStats
+from rsi.sync import LatestSlot
+
+if TYPE_CHECKING:
+    import configparser
+
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_RECONNECT_MIN = 1  # seconds
+_RECONNECT_MAX = 30  # seconds
+_YEE_POLL = 0.5  # seconds
+_YEE_DEFAULT_TEMPERATURE = 4700  # kelvin
+
+
+class YeeLightChanger:
+    """
+    Manage Yee lights.
+
+    A background worker turns the bulb on and switches it to music mode, in
+    which the bulb connects back to us and accepts commands without its
+    usual rate limit. Colours are handed to the worker, which sends only the
+    newest one. If the bulb drops the music connection, the worker sets it
+    up again with backoff, so the sync loop never waits on the bulb.
+    """
+
+    def __init__(self, yee_light_ip: str, effect: str = "smooth", duration: int = 150) -> None:
+        """Initialise Yee light manager."""
+        # Connection taken from https://hyperion-project.org/forum/index.php?thread/529-xiaomi-rgb-bulb-simple-udp-server-solution/
+        self.yee_light_ip = yee_light_ip
+        self.effect = effect  # can be "sudden" or "smooth"
+        self.duration = duration  # miliseconds of duration of effect, ignored in "sudden" effect. MINIMUM 30!
+        self.timeout = 10  # seconds
+        self.keepalive = None
+        self.latency = LatencyStats()
+        self.connected = threading.Event()
+
+        self._pending: LatestSlot[tuple[str, tuple[int, ...]]] = LatestSlot()
+        self._default_sent = threading.Event()
+        self._closed = threading.Event()
+        self._reconnect = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='rsi-yeelight', daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_config(cls: type[YeeLightChanger], section: configparser.SectionProxy) -> YeeLightChanger:
+        """Create a Yee light changer from a config section."""
+        return cls(section['yeelight_ip'])
+
+    def _connect(self) -> yeelight.Bulb:
+        bulb = yeelight.Bulb(self.yee_light_ip, effect=self.effect, duration=self.duration)
+        bulb.turn_on()
+        # Stop/Start music mode, bypasses lamp rate limits, ensures that previous sockets close before starting
+        with contextlib.suppress(yeelight.BulbException):  # Bulbs not in music mode may refuse to leave it
+            bulb.stop_music()
+        bulb.start_music()
+        return bulb
+
+    def _disconnect(self, bulb: yeelight.Bulb) -> None:
+        with contextlib.suppress(yeelight.BulbException, OSError):
+            bulb.stop_music()
+
+    def _run(self) -> None:
+        backoff = _RECONNECT_MIN
+        while not self._closed.is_set():
+            self._reconnect.clear()
+            try:
+                bulb = self._connect()
+            except (yeelight.BulbException, OSError) as err:
+                logger.warning("Connecting to Yee bulb failed (%s), retrying in %.0f s", err, backoff)
+                self._closed.wait(backoff)
+                backoff = min(backoff * 2, _RECONNECT_MAX)
+                continue
+
+            backoff = _RECONNECT_MIN
+            self.connected.set()
+            logger.info("Yee bulb at %s is in music mode", self.yee_light_ip)
+            try:
+                self._session(bulb)
+            except (yeelight.BulbException, OSError) as err:
+                logger.warning("Yee bulb closed the music connection (%s), reconnecting", err)
+            finally:
+                self.connected.clear()
+                self._disconnect(bulb)
+
+    def _session(self, bulb: yeelight.Bulb) -> None:
+        while not self._closed.is_set():
+            if self._reconnect.is_set():
+                self._reconnect.clear()
+                return
+            command = self._pending.take(_YEE_POLL)
+            if command is None:
+                continue
+            method, args = command
+            start = time.perf_counter()
+            try:
+                getattr(bulb, method)(*args)
+            except (yeelight.BulbException, OSError):
+                self.latency.record_error()
+                # Retry after reconnecting, unless a newer command has replaced it by then
+                if not self._pending.full:
+                    self._pending.put(command)
+                raise
+            self.latency.record(time.perf_counter() - start)
+            if method == 'set_color_temp':
+                self._default_sent.set()
+
+    def change_colour(self, red: int, green: int, blue: int) -> None:
+        """Queue a Yee light colour, replacing any colour not yet sent."""
+        self._pending.put(('set_hsv', rgb_to_hsv(red, green, blue)))
+
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Set Yee light colour to the mean of per-LED colours."""
+        self.change_colour(*mean_colour(colours))
+
+    def reconfigure(self, section: configparser.SectionProxy) -> bool:
+        """Move the music connection to a changed bulb address, keeping queued colours."""
+        yee_light_ip = section['yeelight_ip']
+        if yee_light_ip != self.yee_light_ip:
+            self.yee_light_ip = yee_light_ip
+            self._reconnect.set()
+        return True
+
+    def default_colour(self) -> None:
+        """Set Yee light colour to default, waiting until it has been sent to the bulb."""
+        self._default_sent.clear()
+        self._pending.put(('set_color_temp', (_YEE_DEFAULT_TEMPERATURE,)))
+        if not self._default_sent.wait(self.timeout):
+            msg = f"Could not reach the Yee bulb at {self.yee_light_ip}."
+            raise yeelight.BulbException(msg)
+
+    def close(self) -> None:
+        """Stop the worker and leave music mode."""
+        self._closed.set()
+        self._worker.join(self.timeout)
@@ -0,0 +1,94 @@
+"""Apply configuration changes to a running sync."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+from rsi.colour_space import ColourCorrection
+from rsi.filters import SmoothingMode
+from rsi.types import ColourMode
+from rsi.zones import ZoneLayout
+
+if TYPE_CHECKING:
+    from rsi.light_changer import LightChangerResolver
+    from rsi.sync import SyncEngine
+    from rsi.utils_.ConfigurationManager import ConfigChange, ConfigurationManager
+
+logger = logging.getLogger(__name__)
+
+# Which SyncConfig field each ADVANCED option feeds
+_SYNC_FIELDS = {
+    'refresh_rate': 'refresh_rate',
+    'color_precision': 'colour_precision',
+    'color_mode': 'colour_mode',
+    'change_threshold': 'change_threshold',
+    'target_fps': 'target_fps',
+    'smoothing': 'smoothing',
+    'gamma': 'colour_correction',
+    'white_balance': 'colour_correction',
+    'max_brightness': 'colour_correction',
+    'stats_interval': 'stats_interval',
+}
+# Sections that never configure a device
+_SETTINGS_SECTIONS = frozenset({'ADVANCED', 'ZONES', 'UI'})
+
+
+def sync_settings(config_manager: ConfigurationManager) -> dict[str, Any]:
+    """Read every `SyncConfig` field the configuration controls."""
+    config = config_manager.read()
+    return {
+        'refresh_rate': config_manager.get_int('ADVANCED', 'refresh_rate', fallback=0),
+        'colour_precision': config_manager.get_int('ADVANCED', 'color_precision', fallback=20),
+        'colour_mode': ColourMode(config_manager.get_str('ADVANCED', 'color_mode', ColourMode.AVERAGE.value)),
+        'change_threshold': config_manager.get_float('ADVANCED', 'change_threshold', fallback=1.0),
+        'target_fps': config_manager.get_float('ADVANCED', 'target_fps', fallback=0.0),
+        'smoothing': SmoothingMode(config_manager.get_str('ADVANCED', 'smoothing', SmoothingMode.NONE.value)),
+        'stats_interval': config_manager.get_float('ADVANCED', 'stats_interval', fallback=60.0),
+        'colour_correction': (
+            ColourCorrection.from_config(config['ADVANCED']) if config.has_section('ADVANCED') else ColourCorrection()
+        ),
+        'zone_layout': ZoneLayout.from_config(config['ZONES']) if config.has_section('ZONES') else ZoneLayout(),
+    }
+
+
+class LiveReloader:
+    """
+    Keep a sync engine in step with the configuration while it runs.
+
+    Each batch of changes touches only what it affects: sync settings are
+    swapped between frames, a changed device is reconfigured or rebuilt on
+    its own, and devices whose settings did not change keep their
+    connections.
+    """
+
+    def __init__(
+        self,
+        config_manager: ConfigurationManager,
+        light_changer_resolver: LightChangerResolver,
+        sync_engine: SyncEngine,
+    ) -> None:
+        """Initialise live reloader and subscribe it to configuration changes."""
+        self.config_manager = config_manager
+        self.light_changer_resolver = light_changer_resolver
+        self.sync_engine = sync_engine
+        config_manager.subscribe(self.apply)
+
+    def apply(self, changes: list[ConfigChange]) -> None:
+        """Apply a batch of configuration changes."""
+        fields = {
+            _SYNC_FIELDS[change.option]
+            for change in changes
+            if change.section == 'ADVANCED' and change.option in _SYNC_FIELDS
+        }
+        if any(change.section == 'ZONES' for change in changes):
+            fields.add('zone_layout')
+        if fields:
+            settings = sync_settings(self.config_manager)
+            self.sync_engine.update_config(**{name: settings[name] for name in fields})
+            logger.info("Applied changed settings: %s", ", ".join(sorted(fields)))
+
+        sections = {change.section for change in changes} - _SETTINGS_SECTIONS
+        if sections:
+            light_changer = self.light_changer_resolver.apply_changes(self.sync_engine.light_changer, sections)
+            self.sync_engine.set_light_changer(light_changer)
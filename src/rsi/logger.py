@@ -2,24 +2,37 @@
 
 from __future__ import annotations
 
+import abc
 import atexit
+import copy
 import datetime as dt
 import json
 import logging
-import logging.config
 import logging.handlers
+import sys
 import time
 from enum import Enum, auto
 from pathlib import Path
-from typing import Any, NotRequired, TypedDict, override
-
-import rtoml
+from typing import TYPE_CHECKING, Any, ClassVar, TypedDict, TypeVar
 
 from rsi.config import LOGGER_CONFIG_FILE, PACKAGE_NAME
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import NotRequired
+
+_F = TypeVar('_F')
+
+if sys.version_info < (3, 12):
+    def override(method: _F) -> _F:
+        """Mark a method as overriding its parent's; checked by type checkers only."""
+        return method
+else:
+    from typing import override
+
 ROOT_LOGGER_NAME = PACKAGE_NAME
 
-__all__ = ('ROOT_LOGGER_NAME', 'setup_logging')
+__all__ = ('ROOT_LOGGER_NAME', 'RateLimitedLog', 'SampledLog', 'setup_logging')
 
 
 class RecordAttrs(str, Enum):
@@ -56,38 +69,66 @@ def _generate_next_value_(name: str, start: int, count: int, last_values: list)
     taskName = auto()
 
 
+# The fields of each format style that get coloured
+_COLOURED_FIELDS = {
+    logging.PercentStyle: ('%(levelname)s', '%(message)s'),
+    logging.StrFormatStyle: ('{levelname}', '{message}'),
+    logging.StringTemplateStyle: ('${levelname}', '${message}'),
+}
+# Attributes every log record has; anything else came from ``extra``
+_RECORD_ATTRS = frozenset(attr.value for attr in RecordAttrs)
+# Fields the JSON formatter computes instead of copying from the record
+_COMPUTED_FIELDS = frozenset({'message', 'timestamp', 'exc_info', 'stack_info'})
+
+
 class ColouredFormatter(logging.Formatter):
-    """Coloured log formatter."""
+    """
+    Coloured log formatter.
+
+    The colours and the padded level name are baked into one format per
+    level when the formatter is created, so records are formatted without
+    being modified and other handlers still see them as they were logged.
+    """
 
     # This enforces UTC timestamps regardless of local timezone
     # and is necessary for easier log comparisons
     converter = time.gmtime
 
-    @override
-    def format(self, record: logging.LogRecord) -> str:
-        """Format the log record."""
-        log_level_colours = {
-            logging.CRITICAL: '\033[31;1;40m',  # Red, bold
-            logging.ERROR: '\033[31;40m',       # Red
-            logging.WARNING: '\033[33;40m',     # Yellow
-            logging.INFO: '\033[32;40m',        # Green
-            logging.DEBUG: '\033[36;40m',       # Cyan
-        }
-        reset = '\033[0m'
+    LEVEL_COLOURS: ClassVar[dict[int, str]] = {
+        logging.CRITICAL: '\033[31;1;40m',  # Red, bold
+        logging.ERROR: '\033[31;40m',       # Red
+        logging.WARNING: '\033[33;40m',     # Yellow
+        logging.INFO: '\033[32;40m',        # Green
+        logging.DEBUG: '\033[36;40m',       # Cyan
+    }
+    RESET = '\033[0m'
 
-        record.msg = f"{log_level_colours.get(record.levelno, reset)}{record.msg}{reset}"
-        record.levelname = (
-            f"{log_level_colours.get(record.levelno, reset)}{record.levelname:^8}{reset}"
-        )
+    @override
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._level_styles: dict[int, logging.PercentStyle] = {}
+        fields = _COLOURED_FIELDS.get(type(self._style))
+        if fields is None:
+            return
+        levelname, message = fields
+        for levelno, colour in self.LEVEL_COLOURS.items():
+            style = copy.copy(self._style)
+            style._fmt = style._fmt.replace(  # noqa: SLF001
+                levelname, f"{colour}{logging.getLevelName(levelno):^8}{self.RESET}",
+            ).replace(message, f"{colour}{message}{self.RESET}")
+            self._level_styles[levelno] = style
 
-        return super().format(record)
+    @override
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """Format the log record with the colours of its level."""
+        return self._level_styles.get(record.levelno, self._style).format(record)
 
 
 class FormatKeys(TypedDict):
     """Log format keys."""
 
     message: NotRequired[str]
-    timestamp: NotRequired[dt.datetime]
+    timestamp: NotRequired[str]
     level: NotRequired[str]
     logger: NotRequired[str]
     module: NotRequired[str]
@@ -113,22 +154,55 @@ def __init__(self, *args: Any, **kwargs: Any) -> None:
             super().__init__(*args, **kwargs)  # type: ignore[arg-type]
 
 
+def _json_dumps(message: LogDict) -> str:
+    return json.dumps(message, default=str)
+
+
+def _orjson_encoder() -> Callable[[LogDict], str] | None:
+    """Get an encoder backed by orjson, if it is installed."""
+    # Imported here so that modules logging from the sync path do not pay for it
+    try:
+        import orjson
+    except ImportError:
+        return None
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(message: LogDict) -> str:
+        try:
+            return orjson.dumps(message, default=str, option=option).decode()
+        except TypeError:  # Such as integers beyond 64 bits
+            return _json_dumps(message)
+
+    return dumps
+
+
 class JSONLogFormatter(logging.Formatter):
-    """Custom JSON log formatter."""
+    """
+    Custom JSON log formatter.
+
+    Log lines are encoded with orjson when it is installed, unless
+    ``fast_json`` is false.
+    """
 
     @override
-    def __init__(self, *, fmt_keys: FormatKeys | None = None) -> None:
+    def __init__(self, *, fmt_keys: FormatKeys | None = None, fast_json: bool = True) -> None:
         super().__init__()
         self.fmt_keys = (
             fmt_keys
             if fmt_keys is not None
             else FormatKeys()
         )
+        # Which keys are computed per record and which are copied from it, decided once
+        self._fmt_items = tuple(
+            (key, val, val in _COMPUTED_FIELDS) for key, val in self.fmt_keys.items()
+        )
+        encoder = _orjson_encoder() if fast_json else None
+        self._dumps = encoder if encoder is not None else _json_dumps
 
     @override
     def format(self, record: logging.LogRecord) -> str:
         message = self._prepare_log_dict(record)
-        return json.dumps(message, default=str)
+        return self._dumps(message)
 
     def _prepare_log_dict(self, record: logging.LogRecord) -> LogDict:
         required_fields: LogDict = {
@@ -136,33 +210,127 @@ def _prepare_log_dict(self, record: logging.LogRecord) -> LogDict:
             'timestamp': dt.datetime.fromtimestamp(
                 record.created,
                 tz=dt.timezone.utc,
-            ),
+            ).isoformat(),
         }
 
-        if record.exc_info is not None:
+        if record.exc_info:
             required_fields['exc_info'] = self.formatException(record.exc_info)
 
         if record.stack_info is not None:
             required_fields['stack_info'] = self.formatStack(record.stack_info)
 
-        message: LogDict = {  # type: ignore[assignment]
-            key: msg_val
-            if (msg_val := required_fields.pop(val, None)) is not None  # type: ignore[misc, typeddict-item]
-            else getattr(record, val)  # type: ignore[call-overload]
-            for key, val in self.fmt_keys.items()
-        }
+        message: dict[str, Any] = {}
+        for key, val, computed in self._fmt_items:
+            msg_val = required_fields.pop(val, None) if computed else None  # type: ignore[misc]
+            message[key] = msg_val if msg_val is not None else getattr(record, val)
 
         message.update(required_fields)
 
-        for key, val in record.__dict__.items():
-            if key not in RecordAttrs:
-                message[key] = val  # type: ignore[literal-required]
+        # Only records logged with ``extra`` carry attributes of their own
+        if extra_keys := record.__dict__.keys() - _RECORD_ATTRS:
+            message.update((key, val) for key, val in record.__dict__.items() if key in extra_keys)
+
+        return message  # type: ignore[return-value]
+
+
+class _HotPathLog(abc.ABC):
+    """Base for loggers called from per-frame code, which let only some calls through."""
+
+    def __init__(self, logger: logging.Logger) -> None:
+        self.logger = logger
+
+    @abc.abstractmethod
+    def _admit(self, msg: str, args: tuple[object, ...]) -> tuple[str, tuple[object, ...], dict[str, Any]] | None:
+        """Decide whether a call is logged; return its message, arguments and extra fields if so."""
+
+    def _log(self, level: int, msg: str, args: tuple[object, ...], *, exc_info: bool = False) -> bool:
+        # The level check comes first, so calls below the level cost next to nothing
+        if not self.logger.isEnabledFor(level) or (admitted := self._admit(msg, args)) is None:
+            return False
+        msg, args, extra = admitted
+        # Attribute the record to the caller of the public method, not to this module
+        self.logger.log(level, msg, *args, exc_info=exc_info, extra=extra, stacklevel=3)
+        return True
+
+    def log(self, level: int, msg: str, *args: object, exc_info: bool = False) -> bool:
+        """Log at ``level`` if this call gets through; return whether it did."""
+        return self._log(level, msg, args, exc_info=exc_info)
+
+    def debug(self, msg: str, *args: object) -> bool:
+        """Log at DEBUG if this call gets through."""
+        return self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg: str, *args: object) -> bool:
+        """Log at INFO if this call gets through."""
+        return self._log(logging.INFO, msg, args)
+
+    def warning(self, msg: str, *args: object) -> bool:
+        """Log at WARNING if this call gets through."""
+        return self._log(logging.WARNING, msg, args)
 
-        return message
+    def exception(self, msg: str, *args: object) -> bool:
+        """Log at ERROR with the current exception if this call gets through."""
+        return self._log(logging.ERROR, msg, args, exc_info=True)
+
+
+class RateLimitedLog(_HotPathLog):
+    """
+    Log at most once every ``interval`` seconds.
+
+    Meant for errors that repeat every frame, such as an unreachable
+    device. Calls in between are only counted, and the next record that
+    gets through says how many it stands for, also as ``suppressed``.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 5.0) -> None:
+        """Initialise rate-limited log."""
+        super().__init__(logger)
+        self.interval = interval
+        self.suppressed = 0
+        self._next_time = 0.0
+
+    @override
+    def _admit(self, msg: str, args: tuple[object, ...]) -> tuple[str, tuple[object, ...], dict[str, Any]] | None:
+        now = time.monotonic()
+        if now < self._next_time:
+            self.suppressed += 1
+            return None
+        self._next_time = now + self.interval
+        suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            msg, args = f"{msg} (%d more suppressed)", (*args, suppressed)
+        return msg, args, {'suppressed': suppressed}
+
+
+class SampledLog(_HotPathLog):
+    """
+    Log the first call and every ``every``-th one after it.
+
+    Meant for tracing per-frame values without writing a record per frame;
+    records carry the sampling rate as ``sampled_every``.
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = 600) -> None:
+        """Initialise sampled log."""
+        super().__init__(logger)
+        self.every = every
+        self.calls = 0
+
+    @override
+    def _admit(self, msg: str, args: tuple[object, ...]) -> tuple[str, tuple[object, ...], dict[str, Any]] | None:
+        self.calls += 1
+        if (self.calls - 1) % self.every:
+            return None
+        return msg, args, {'sampled_every': self.every}
 
 
 def setup_logging() -> None:
     """Set up logging."""
+    # Only needed here, which keeps this module cheap to import from the sync path
+    import logging.config
+
+    import rtoml
+
     (Path.cwd() / 'logs').mkdir(exist_ok=True)
     logger_data = LOGGER_CONFIG_FILE.read_text(encoding='utf-8')
     logging_config = rtoml.loads(logger_data)
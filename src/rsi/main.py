@@ -28,7 +28,11 @@ def main() -> None:
 
     logger.debug("Main window initialised.")
 
-    main_window.show_main_window()
+    try:
+        main_window.show_main_window()
+    finally:
+        light_change_resolver.close()
+        config_manager.close()
 
 
 if __name__ == '__main__':
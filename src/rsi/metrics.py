@@ -0,0 +1,153 @@
+"""Export sync statistics in the Prometheus text format."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from rsi.utils_.ConfigurationManager import ConfigurationManager
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+_QUANTILES = {'p50_ms': '0.5', 'p95_ms': '0.95', 'p99_ms': '0.99'}
+_COUNTERS = {
+    'frames_captured': "Frames captured and reduced.",
+    'frames_sent': "Colours sent to the lights.",
+    'frames_suppressed': "Colours not sent because they did not visibly change.",
+    'frames_dropped': "Colours replaced before they could be sent.",
+    'deadline_misses': "Frames that overran the target frame period.",
+}
+
+
+def _label(value: object) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _summary(lines: list[str], name: str, label: str, values: dict[str, dict[str, Any]]) -> None:
+    """Append one Prometheus summary, with a series per labelled latency summary."""
+    for key, summary in values.items():
+        for field, quantile in _QUANTILES.items():
+            lines.append(f'{name}{{{label}="{_label(key)}",quantile="{quantile}"}} {summary[field] / 1000}')
+        if 'sum_ms' in summary:
+            lines.append(f'{name}_sum{{{label}="{_label(key)}"}} {summary["sum_ms"] / 1000}')
+        lines.append(f'{name}_count{{{label}="{_label(key)}"}} {summary["count"]}')
+
+
+def prometheus_text(stats: dict[str, Any]) -> str:
+    """Render `SyncEngine.stats` as a Prometheus text exposition."""
+    lines = [
+        '# HELP rsi_running Whether the sync is running.',
+        '# TYPE rsi_running gauge',
+        f'rsi_running {int(stats["running"])}',
+        '# HELP rsi_fps Achieved capture frame rate.',
+        '# TYPE rsi_fps gauge',
+        f'rsi_fps {stats["fps"]}',
+    ]
+    for key, description in _COUNTERS.items():
+        lines += [f'# HELP rsi_{key}_total {description}', f'# TYPE rsi_{key}_total counter']
+        lines.append(f'rsi_{key}_total {stats[key]}')
+
+    lines += [
+        '# HELP rsi_stage_latency_seconds Latency of each pipeline stage over the recent frames.',
+        '# TYPE rsi_stage_latency_seconds summary',
+    ]
+    _summary(lines, 'rsi_stage_latency_seconds', 'stage', stats['stages'])
+
+    devices = stats.get('devices')
+    if devices:
+        lines += ['# HELP rsi_device_healthy Whether a device accepts colours.', '# TYPE rsi_device_healthy gauge']
+        lines += [
+            f'rsi_device_healthy{{device="{_label(name)}"}} {int(device["healthy"])}'
+            for name, device in devices.items()
+        ]
+        lines += ['# HELP rsi_device_errors_total Failed sends per device.', '# TYPE rsi_device_errors_total counter']
+        lines += [
+            f'rsi_device_errors_total{{device="{_label(name)}"}} {device["errors"]}'
+            for name, device in devices.items()
+        ]
+        lines += [
+            '# HELP rsi_device_latency_seconds Send latency per device over the recent colours.',
+            '# TYPE rsi_device_latency_seconds summary',
+        ]
+        _summary(lines, 'rsi_device_latency_seconds', 'device', devices)
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server: _MetricsHTTPServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text(self.server.source()).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+        logger.debug(format, *args)
+
+
+class _MetricsHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], source: Callable[[], dict[str, Any]]) -> None:
+        self.source = source
+        super().__init__(address, _MetricsHandler)
+
+
+class MetricsServer:
+    """
+    Serve sync statistics at ``/metrics`` for Prometheus to scrape.
+
+    Statistics are only gathered when a scrape comes in, so the server
+    costs the sync nothing between scrapes. It listens on localhost unless
+    given another ``host``.
+    """
+
+    def __init__(self, port: int, source: Callable[[], dict[str, Any]], host: str = '127.0.0.1') -> None:
+        """Initialise metrics server; ``source`` returns `SyncEngine.stats`-style statistics."""
+        self._server = _MetricsHTTPServer((host, port), source)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='rsi-metrics', daemon=True)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The address the server listens on."""
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> None:
+        """Start serving in the background."""
+        self._thread.start()
+        logger.info("Serving metrics at http://%s:%d/metrics", *self.address)
+
+    def close(self) -> None:
+        """Stop serving and release the port."""
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+
+def start_metrics_server(
+    config_manager: ConfigurationManager, source: Callable[[], dict[str, Any]],
+) -> MetricsServer | None:
+    """Start serving metrics on the configured ``metrics_port``, if one is set and free."""
+    port = config_manager.get_int('ADVANCED', 'metrics_port', fallback=0)
+    if port <= 0:
+        return None
+    try:
+        server = MetricsServer(port, source)
+    except OSError as err:
+        logger.warning("Cannot serve metrics on port %d: %s", port, err)
+        return None
+    server.start()
+    return server
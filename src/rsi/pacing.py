@@ -0,0 +1,69 @@
+"""Frame pacing for the sync loop."""
+
+from __future__ import annotations
+
+import collections
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import threading
+    from collections.abc import Callable
+
+_FPS_WINDOW = 120  # frames
+
+
+class FramePacer:
+    """
+    Hold a loop to a target frame rate using monotonic deadlines.
+
+    Each frame is scheduled one period after the previous deadline rather
+    than after the work finished, so capture and send costs do not stretch
+    the frame time. A frame that overruns its deadline counts as a miss and
+    the schedule restarts from now, instead of bursting to catch up.
+    """
+
+    def __init__(self, period: float = 0.0, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialise frame pacer with a period in seconds; 0 runs as fast as possible."""
+        self.period = period
+        self.clock = clock
+        self.deadline_misses = 0
+        self._deadline: float | None = None
+        self._frame_times: collections.deque[float] = collections.deque(maxlen=_FPS_WINDOW)
+
+    @classmethod
+    def from_fps(cls: type[FramePacer], target_fps: float) -> FramePacer:
+        """Create a pacer for a target frame rate."""
+        return cls(1 / target_fps if target_fps > 0 else 0.0)
+
+    @property
+    def fps(self) -> float:
+        """Achieved frame rate over the last frames."""
+        if len(self._frame_times) < 2:  # noqa: PLR2004
+            return 0.0
+        elapsed = self._frame_times[-1] - self._frame_times[0]
+        return (len(self._frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def reset(self) -> None:
+        """Restart the schedule and the frame rate measurement."""
+        self._deadline = None
+        self._frame_times.clear()
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Wait for the next frame deadline; return False if stopped meanwhile."""
+        now = self.clock()
+        self._frame_times.append(now)
+
+        if self.period <= 0:
+            return not stop.is_set()
+
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.period
+
+        if now > self._deadline:
+            self.deadline_misses += 1
+            self._deadline = now
+            return not stop.is_set()
+
+        return not stop.wait(self._deadline - now)
@@ -0,0 +1,164 @@
+"""Preallocated packet builders for UDP light protocols."""
+
+from __future__ import annotations
+
+from enum import IntEnum
+
+import numpy as np
+
+_COLOUR_CHANNELS = 3
+
+
+class WLEDProtocol(IntEnum):
+    """WLED UDP realtime protocol numbers."""
+
+    WARLS = 1
+    DRGB = 2
+    DRGBW = 3
+    DNRGB = 4
+
+
+DRGB_MAX_LEDS = 490
+DNRGB_LEDS_PER_PACKET = 489
+_DRGB_HEADER = 2
+_DNRGB_HEADER = 4
+
+
+class WLEDPacketBuilder:
+    """
+    Build WLED realtime packets in place.
+
+    Packets live in one preallocated buffer and colours are written straight
+    into it through NumPy views, so a frame costs the same no matter how
+    often it is built. Up to 490 LEDs fit in a single DRGB packet; longer
+    strips are split into DNRGB packets of 489 LEDs, each carrying its
+    start index.
+    """
+
+    def __init__(self, led_count: int, timeout: int = 1) -> None:
+        """Initialise packet builder for a strip; ``timeout`` is WLED's realtime timeout in seconds."""
+        self.led_count = led_count
+        self.timeout = timeout
+
+        if led_count <= DRGB_MAX_LEDS:
+            self.protocol = WLEDProtocol.DRGB
+            header_size, per_packet = _DRGB_HEADER, max(led_count, 1)
+        else:
+            self.protocol = WLEDProtocol.DNRGB
+            header_size, per_packet = _DNRGB_HEADER, DNRGB_LEDS_PER_PACKET
+
+        packet_count = -(-led_count // per_packet) or 1
+        packet_size = header_size + per_packet * _COLOUR_CHANNELS
+        self._buffer = bytearray(packet_count * packet_size)
+        packets = np.frombuffer(self._buffer, dtype=np.uint8).reshape(packet_count, packet_size)
+
+        packets[:, 0] = self.protocol
+        packets[:, 1] = timeout
+        if self.protocol == WLEDProtocol.DNRGB:
+            starts = np.arange(packet_count) * per_packet
+            packets[:, 2] = starts >> 8
+            packets[:, 3] = starts & 0xFF
+
+        self._leds = packets[:, header_size:].reshape(packet_count, per_packet, _COLOUR_CHANNELS)
+        self._full_packets = led_count // per_packet
+        self._per_packet = per_packet
+
+        # The last packet only carries the LEDs that are left over
+        sizes = [packet_size] * packet_count
+        if self._full_packets < packet_count:
+            sizes[-1] = header_size + (led_count - self._full_packets * per_packet) * _COLOUR_CHANNELS
+        buffer = memoryview(self._buffer)
+        self.packets = [buffer[idx * packet_size:idx * packet_size + size] for idx, size in enumerate(sizes)]
+        """Packets to send, as views of the shared buffer."""
+
+    def fill(self, colour: tuple[int, int, int]) -> list[memoryview]:
+        """Set every LED to the same RGB colour."""
+        self._leds[...] = colour
+        return self.packets
+
+    def build(self, colours: np.ndarray) -> list[memoryview]:
+        """Write an ``(N, 3)`` RGB array into the packets; extra colours are ignored."""
+        full = self._full_packets * self._per_packet
+        self._leds[:self._full_packets] = colours[:full].reshape(self._full_packets, self._per_packet, _COLOUR_CHANNELS)
+        remainder = colours[full:self.led_count]
+        if remainder.size:
+            self._leds[self._full_packets, :len(remainder)] = remainder
+        return self.packets
+
+
+DDP_PORT = 4048
+DDP_HEADER_SIZE = 10
+DDP_MAX_DATA = 1440  # 480 RGB pixels, fits a standard Ethernet frame
+_DDP_VERSION_1 = 0x40
+_DDP_PUSH = 0x01
+_DDP_TYPE_RGB24 = 0x0B
+_DDP_DESTINATION_DISPLAY = 0x01
+_DDP_SEQUENCE_MAX = 15
+
+
+class DDPPacketBuilder:
+    """
+    Build Distributed Display Protocol frames in place.
+
+    A frame is split into packets of up to 480 pixels, each carrying its
+    byte offset into the frame. Only the last packet has the push flag set,
+    so receivers display the frame once it is complete. Headers are
+    written once; each frame only updates the sequence number and the
+    pixel data through NumPy views of one preallocated buffer.
+    """
+
+    def __init__(self, led_count: int) -> None:
+        """Initialise packet builder for ``led_count`` RGB pixels."""
+        self.led_count = led_count
+        self.sequence = 0
+        per_packet = DDP_MAX_DATA // _COLOUR_CHANNELS
+        packet_count = -(-led_count // per_packet) or 1
+        packet_size = DDP_HEADER_SIZE + DDP_MAX_DATA
+
+        self._buffer = bytearray(packet_count * packet_size)
+        packets = np.frombuffer(self._buffer, dtype=np.uint8).reshape(packet_count, packet_size)
+        self._headers = packets[:, :DDP_HEADER_SIZE]
+        self._pixels = packets[:, DDP_HEADER_SIZE:].reshape(packet_count, per_packet, _COLOUR_CHANNELS)
+        self._per_packet = per_packet
+        self._full_packets = led_count // per_packet
+
+        offsets = np.arange(packet_count, dtype=np.uint32) * DDP_MAX_DATA
+        lengths = np.full(packet_count, DDP_MAX_DATA, dtype=np.uint16)
+        if self._full_packets < packet_count:
+            lengths[-1] = (led_count - self._full_packets * per_packet) * _COLOUR_CHANNELS
+        self._headers[:, 0] = _DDP_VERSION_1
+        self._headers[-1, 0] |= _DDP_PUSH
+        self._headers[:, 2] = _DDP_TYPE_RGB24
+        self._headers[:, 3] = _DDP_DESTINATION_DISPLAY
+        self._headers[:, 4:8] = offsets.astype('>u4')[:, None].view(np.uint8)
+        self._headers[:, 8:10] = lengths.astype('>u2')[:, None].view(np.uint8)
+
+        buffer = memoryview(self._buffer)
+        self.packets = [
+            buffer[idx * packet_size:idx * packet_size + DDP_HEADER_SIZE + int(length)]
+            for idx, length in enumerate(lengths)
+        ]
+        """Packets to send, as views of the shared buffer."""
+
+    def _next_sequence(self) -> None:
+        # Sequence numbers run 1-15; 0 means the receiver should not check them
+        self.sequence = self.sequence % _DDP_SEQUENCE_MAX + 1
+        self._headers[:, 1] = self.sequence
+
+    def fill(self, colour: tuple[int, int, int]) -> list[memoryview]:
+        """Set every pixel to the same RGB colour."""
+        self._next_sequence()
+        self._pixels[...] = colour
+        return self.packets
+
+    def build(self, colours: np.ndarray) -> list[memoryview]:
+        """Write an ``(N, 3)`` RGB array into the packets; extra colours are ignored."""
+        self._next_sequence()
+        full = self._full_packets * self._per_packet
+        self._pixels[:self._full_packets] = colours[:full].reshape(
+            self._full_packets, self._per_packet, _COLOUR_CHANNELS,
+        )
+        remainder = colours[full:self.led_count]
+        if remainder.size:
+            self._pixels[self._full_packets, :len(remainder)] = remainder
+        return self.packets
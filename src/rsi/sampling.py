@@ -0,0 +1,119 @@
+"""Screen sampling grids."""
+
+from __future__ import annotations
+
+import functools
+import math
+from dataclasses import dataclass
+from enum import Enum
+
+import numpy as np
+
+from rsi.config import PRIME_NUMBBERS
+
+# Large prime used to step the column phase between sampled rows.
+# It is coprime with every stride the precision table can produce.
+_PHASE_STEP = 7919
+_JITTER_SEED = 0x525349  # "RSI"
+
+# Worst-case standard deviation of an 8-bit channel (half black, half white)
+_MAX_CHANNEL_STD = 127.5
+
+
+class OffsetMode(str, Enum):
+    """How sampled rows are offset from each other."""
+
+    NONE = "none"
+    PRIME = "prime"
+    JITTER = "jitter"
+
+
+@dataclass(frozen=True)
+class SamplingGrid:
+    """Pixel positions sampled from a frame of a given geometry."""
+
+    height: int
+    width: int
+    row_stride: int
+    col_stride: int
+    indices: np.ndarray | None
+    """Flat pixel indices, or None when plain slicing covers the grid."""
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Rows and columns of sampled pixels."""
+        if self.indices is None:
+            return math.ceil(self.height / self.row_stride), math.ceil(self.width / self.col_stride)
+        rows = len(range(self.row_stride // 2, self.height, self.row_stride))
+        return rows, self.indices.size // rows if rows else 0
+
+    @property
+    def sample_count(self) -> int:
+        """Number of pixels sampled per frame."""
+        if self.indices is not None:
+            return self.indices.size
+        return math.ceil(self.height / self.row_stride) * math.ceil(self.width / self.col_stride)
+
+
+def get_strides(colour_precision: int) -> tuple[int, int]:
+    """
+    Split the precision's sample rate into row and column strides.
+
+    The product of the strides approximates ``PRIME_NUMBBERS[colour_precision]``,
+    so one in that many pixels is sampled.
+    """
+    sample_rate = PRIME_NUMBBERS[colour_precision]
+    row_stride = max(1, math.isqrt(sample_rate))
+    col_stride = max(1, round(sample_rate / row_stride))
+    return row_stride, col_stride
+
+
+@functools.lru_cache(maxsize=32)
+def get_sampling_grid(
+    height: int,
+    width: int,
+    colour_precision: int,
+    offset_mode: OffsetMode = OffsetMode.PRIME,
+) -> SamplingGrid:
+    """Build the sampling grid for a frame geometry, cached per geometry and precision."""
+    row_stride, col_stride = get_strides(colour_precision)
+
+    if offset_mode == OffsetMode.NONE or col_stride == 1 or width < col_stride:
+        return SamplingGrid(height, width, row_stride, col_stride, None)
+
+    rows = np.arange(row_stride // 2, height, row_stride, dtype=np.intp)
+    if offset_mode == OffsetMode.JITTER:
+        rng = np.random.default_rng(_JITTER_SEED)
+        phases = rng.integers(0, col_stride, size=rows.size, dtype=np.intp)
+    else:
+        phases = (np.arange(rows.size, dtype=np.intp) * _PHASE_STEP) % col_stride
+
+    # Every row gets the same number of columns so the grid stays rectangular
+    cols = np.arange(0, width - col_stride + 1, col_stride, dtype=np.intp)
+    indices = (rows[:, None] * width + cols[None, :] + phases[:, None]).ravel()
+    indices.setflags(write=False)
+
+    return SamplingGrid(height, width, row_stride, col_stride, indices)
+
+
+def cost_curve(height: int = 1080, width: int = 1920) -> list[dict[str, float]]:
+    """
+    Estimate the cost and accuracy of every precision level for a frame geometry.
+
+    ``relative_cost`` is the share of pixels read compared to precision 0, and
+    ``max_error`` is the worst-case standard error of a channel mean in 8-bit levels.
+    """
+    total = height * width
+    curve = []
+    for colour_precision in range(len(PRIME_NUMBBERS)):
+        grid = get_sampling_grid(height, width, colour_precision, OffsetMode.NONE)
+        samples = grid.sample_count
+        curve.append({
+            'precision': colour_precision,
+            'row_stride': grid.row_stride,
+            'col_stride': grid.col_stride,
+            'samples': samples,
+            'relative_cost': samples / total,
+            'max_error': _MAX_CHANNEL_STD / math.sqrt(samples),
+        })
+    return curve
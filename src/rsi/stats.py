@@ -0,0 +1,121 @@
+"""Runtime statistics."""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import math
+import threading
+from array import array
+
+_DEFAULT_PERCENTILES = (50, 95, 99)
+
+# Histogram buckets: four per doubling from 1 us to about 16 s, so a percentile is within 10 % of the truth
+_BUCKETS_PER_OCTAVE = 4
+_BUCKET_MIN = 1e-6  # seconds
+_BUCKET_OCTAVES = 24
+
+PIPELINE_STAGES = ('grab', 'reduce', 'convert', 'send')
+
+
+class LatencyStats:
+    """
+    Rolling latency histogram over the last ``size`` samples, with an error count.
+
+    Buckets are log-spaced and fixed, and each sample's bucket is kept in a
+    preallocated ring so it can be taken out again when it ages out.
+    Recording is a bisect and a few in-place updates under a lock, with no
+    allocation, so it is cheap enough for the frame loop and safe from
+    several device workers at once.
+    """
+
+    edges = tuple(_BUCKET_MIN * 2 ** (index / _BUCKETS_PER_OCTAVE) for index in range(
+        _BUCKETS_PER_OCTAVE * _BUCKET_OCTAVES + 1,
+    ))
+    """Upper bound in seconds of every bucket but the last, which holds anything slower."""
+
+    def __init__(self, size: int = 1024) -> None:
+        """Initialise latency statistics."""
+        self._counts = array('l', bytes(array('l').itemsize * (len(self.edges) + 1)))
+        self._ring = array('H', bytes(array('H').itemsize * size))
+        self._lock = threading.Lock()
+        self.count = 0
+        """Total number of samples recorded."""
+        self.total = 0.0
+        """Total seconds recorded."""
+        self.errors = 0
+        """Total number of failed operations."""
+
+    def record(self, seconds: float) -> None:
+        """Record one latency sample."""
+        bucket = bisect.bisect_left(self.edges, seconds)
+        with self._lock:
+            slot = self.count % len(self._ring)
+            if self.count >= len(self._ring):
+                self._counts[self._ring[slot]] -= 1
+            self._ring[slot] = bucket
+            self._counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+
+    def record_error(self) -> None:
+        """Count one failed operation."""
+        with self._lock:
+            self.errors += 1
+
+    def reset(self) -> None:
+        """Forget every sample and error."""
+        with self._lock:
+            for index in range(len(self._counts)):
+                self._counts[index] = 0
+            self.count = 0
+            self.total = 0.0
+            self.errors = 0
+
+    def percentiles(self, percentiles: tuple[float, ...] = _DEFAULT_PERCENTILES) -> dict[float, float]:
+        """Estimate latency percentiles in seconds over the window, from the bucket midpoints."""
+        with self._lock:
+            cumulative = list(itertools.accumulate(self._counts))
+        samples = cumulative[-1]
+        result = dict.fromkeys(percentiles, 0.0)
+        if not samples:
+            return result
+        for percentile in percentiles:
+            bucket = bisect.bisect_left(cumulative, max(1, math.ceil(percentile / 100 * samples)))
+            upper = self.edges[min(bucket, len(self.edges) - 1)]
+            lower = self.edges[bucket - 1] if 0 < bucket < len(self.edges) else upper
+            result[percentile] = math.sqrt(lower * upper)
+        return result
+
+    def summary(self) -> dict[str, float]:
+        """Get counts, the total and p50/p95/p99 latencies in milliseconds."""
+        p50, p95, p99 = self.percentiles().values()
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'sum_ms': self.total * 1000,
+            'p50_ms': p50 * 1000,
+            'p95_ms': p95 * 1000,
+            'p99_ms': p99 * 1000,
+        }
+
+
+class PipelineStats:
+    """Rolling latency histograms for each stage of the capture-to-light pipeline."""
+
+    def __init__(self, stages: tuple[str, ...] = PIPELINE_STAGES, size: int = 1024) -> None:
+        """Initialise pipeline statistics."""
+        self.stages = {stage: LatencyStats(size) for stage in stages}
+
+    def __getitem__(self, stage: str) -> LatencyStats:
+        """Get the histogram of a stage, for recording into directly."""
+        return self.stages[stage]
+
+    def reset(self) -> None:
+        """Forget every sample."""
+        for histogram in self.stages.values():
+            histogram.reset()
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Get the summary of each stage."""
+        return {stage: histogram.summary() for stage, histogram in self.stages.items()}
@@ -0,0 +1,345 @@
+"""Background capture-to-light sync engine."""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Generic, TypeVar, Union
+
+import numpy as np
+
+from rsi.colour import ActiveAreaDetector, ScreenSampler
+from rsi.colour_space import ColourCorrection
+from rsi.filters import ChangeGate, SmoothingMode, make_temporal_filter
+from rsi.logger import RateLimitedLog, SampledLog
+from rsi.pacing import FramePacer
+from rsi.stats import PipelineStats
+from rsi.tiles import TileReducer
+from rsi.types import ColourMode
+from rsi.zones import ZoneLayout, reduce_zones
+
+if TYPE_CHECKING:
+    from rsi.filters import TemporalFilter
+    from rsi.types import LightChanger
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+Colour = Union[tuple[int, int, int], np.ndarray]
+
+_SLOT_POLL_INTERVAL = 0.1  # seconds
+_CAPTURE_ERROR_BACKOFF = 1  # seconds
+_JOIN_TIMEOUT = 2  # seconds
+
+
+class LatestSlot(Generic[T]):
+    """
+    Hand the newest value from one thread to another.
+
+    Putting a value replaces any value that has not been taken yet, so a
+    slow consumer always gets the freshest value instead of a backlog.
+    """
+
+    def __init__(self) -> None:
+        """Initialise empty slot."""
+        self._condition = threading.Condition()
+        self._value: T | None = None
+        self._full = False
+        self.dropped = 0
+        """Number of values replaced before they were taken."""
+
+    @property
+    def full(self) -> bool:
+        """Whether a value is waiting to be taken."""
+        return self._full
+
+    def put(self, value: T) -> None:
+        """Store a value, replacing any unread one."""
+        with self._condition:
+            if self._full:
+                self.dropped += 1
+            self._value = value
+            self._full = True
+            self._condition.notify()
+
+    def take(self, timeout: float | None = None) -> T | None:
+        """Wait for a value and take it, or return None on timeout."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._full, timeout):
+                return None
+            value, self._value = self._value, None
+            self._full = False
+            return value
+
+    def clear(self) -> None:
+        """Drop any unread value."""
+        with self._condition:
+            self._value = None
+            self._full = False
+
+
+@dataclass(frozen=True)
+class SyncConfig:
+    """Settings the sync engine reads every frame."""
+
+    monitor_num: int = 0
+    refresh_rate: int = 0
+    """Milliseconds between screen captures, used when no target frame rate is set."""
+    target_fps: float = 0.0
+    colour_precision: int = 20
+    colour_mode: ColourMode = ColourMode.AVERAGE
+    zone_layout: ZoneLayout = field(default_factory=ZoneLayout)
+    crop_black_bars: bool = False
+    change_threshold: float = 1.0
+    """Smallest CIELAB ΔE worth sending to the lights."""
+    smoothing: SmoothingMode = SmoothingMode.NONE
+    smoothing_strength: float | None = None
+    colour_correction: ColourCorrection = field(default_factory=ColourCorrection)
+    """Gamma, white balance and brightness cap applied to every colour before it is sent."""
+    stats_interval: float = 60.0
+    """Seconds between pipeline statistics log records; 0 turns them off."""
+
+    @property
+    def frame_period(self) -> float:
+        """Seconds between frames."""
+        if self.target_fps > 0:
+            return 1 / self.target_fps
+        return self.refresh_rate / 1000
+
+
+class SyncEngine:
+    """
+    Sync the lights to the screen on background threads.
+
+    A capture thread grabs and reduces frames while a send thread pushes
+    colours to the light changer. They meet in a `LatestSlot`, so a slow
+    device drops stale colours instead of queueing them, and neither stage
+    ever blocks the GUI thread, which only signals the engine.
+    """
+
+    def __init__(self, light_changer: LightChanger, config: SyncConfig | None = None) -> None:
+        """Initialise sync engine."""
+        self.light_changer = light_changer
+        self.config = config if config is not None else SyncConfig()
+        self.frames_captured = 0
+        self.change_gate = ChangeGate(self.config.change_threshold, light_changer.keepalive)
+        self.pacer = FramePacer(self.config.frame_period)
+        self.pipeline = PipelineStats()
+        # Failures repeat every frame while a screen or device is unavailable
+        self._capture_errors = RateLimitedLog(logger)
+        self._send_errors = RateLimitedLog(logger)
+        self._sent_colours = SampledLog(logger, every=600)
+        self._slot: LatestSlot[Colour] = LatestSlot()
+        self._stop = threading.Event()
+        self._stop.set()
+        self._refresh_screens = threading.Event()
+        self._restore_default = True
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        """Whether the sync is running."""
+        return not self._stop.is_set()
+
+    @property
+    def frames_dropped(self) -> int:
+        """Number of captured colours replaced before they were sent."""
+        return self._slot.dropped
+
+    @property
+    def fps(self) -> float:
+        """Achieved capture frame rate."""
+        return self.pacer.fps
+
+    @property
+    def deadline_misses(self) -> int:
+        """Number of frames that overran the target frame period."""
+        return self.pacer.deadline_misses
+
+    @property
+    def frames_sent(self) -> int:
+        """Number of colours sent to the lights."""
+        return self.change_gate.sent
+
+    @property
+    def frames_suppressed(self) -> int:
+        """Number of colours not sent because they did not visibly change."""
+        return self.change_gate.suppressed
+
+    def stats(self) -> dict[str, Any]:
+        """Counters, rates and stage latencies of the sync, plus per-device health in multi mode."""
+        stats = {
+            'running': self.running,
+            'fps': round(self.fps, 2),
+            'frames_captured': self.frames_captured,
+            'frames_sent': self.frames_sent,
+            'frames_suppressed': self.frames_suppressed,
+            'frames_dropped': self.frames_dropped,
+            'deadline_misses': self.deadline_misses,
+            'stages': self.pipeline.summary(),
+        }
+        health = getattr(self.light_changer, 'health', None)
+        if health is not None:
+            stats['devices'] = health()
+        return stats
+
+    def start(self) -> None:
+        """Start syncing, if not already running."""
+        if self.running:
+            return
+        self._join()
+        self._slot.clear()
+        self.change_gate.reset()
+        self.pipeline.reset()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, args=(self._stop,), name='rsi-capture', daemon=True),
+            threading.Thread(target=self._send_loop, args=(self._stop,), name='rsi-send', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Sync started.")
+
+    def stop(self, *, restore_default: bool = True) -> None:
+        """Signal the sync to stop, optionally returning the lights to their default colour."""
+        if not self.running:
+            return
+        self._restore_default = restore_default
+        self._stop.set()
+        logger.info("Sync stopping.")
+
+    def close(self) -> None:
+        """Stop the sync and wait briefly for the threads to finish."""
+        self.stop()
+        self._join()
+
+    def update_config(self, **changes: Any) -> None:  # noqa: ANN401
+        """Change sync settings; the capture thread picks them up on its next frame."""
+        self.config = dataclasses.replace(self.config, **changes)
+        self.change_gate.threshold = self.config.change_threshold
+
+    def set_light_changer(self, light_changer: LightChanger) -> None:
+        """Send future colours to a different light changer."""
+        self.light_changer = light_changer
+        self.change_gate.keepalive = light_changer.keepalive
+        self.change_gate.reset()
+
+    def refresh_screens(self) -> None:
+        """Ask the capture thread to reopen its session for a changed set of screens."""
+        self._refresh_screens.set()
+
+    def _join(self) -> None:
+        for thread in self._threads:
+            thread.join(_JOIN_TIMEOUT)
+        self._threads = []
+
+    def _grab(self, sampler: ScreenSampler, config: SyncConfig) -> np.ndarray:
+        if config.crop_black_bars != (sampler.active_area is not None):
+            sampler.active_area = ActiveAreaDetector() if config.crop_black_bars else None
+        if self._refresh_screens.is_set():
+            self._refresh_screens.clear()
+            sampler.refresh()
+        return sampler.grab_monitor(config.monitor_num)
+
+    def _reduce(self, sampler: ScreenSampler, frame: np.ndarray, config: SyncConfig) -> Colour:
+        if config.zone_layout.enabled:
+            return reduce_zones(frame, config.colour_precision, config.zone_layout)
+        return sampler.reduce_screen(frame, config.colour_precision, config.colour_mode)
+
+    def _smooth(self, temporal_filter: TemporalFilter, colour: Colour) -> Colour:
+        smoothed = temporal_filter.apply(np.asarray(colour), self.pacer.clock())
+        if isinstance(colour, np.ndarray):
+            return np.rint(smoothed).astype(np.uint8)
+        red, green, blue = (round(channel) for channel in smoothed.tolist())
+        return red, green, blue
+
+    def _correct(self, correction: ColourCorrection, colour: Colour) -> Colour:
+        if isinstance(colour, np.ndarray):
+            return correction.apply(colour)
+        return correction.apply_colour(*colour)
+
+    def _log_stats(self) -> None:
+        stats = self.stats()
+        logger.info(
+            "Sync at %.1f fps, %d dropped, %d deadline misses",
+            stats['fps'], stats['frames_dropped'], stats['deadline_misses'],
+            extra={'pipeline': stats},
+        )
+
+    def _capture_loop(self, stop: threading.Event) -> None:
+        # The sampler is created here because mss binds to the thread that opens it
+        sampler = ScreenSampler(tile_reducer=TileReducer())
+        temporal_filter: TemporalFilter | None = None
+        filter_settings = None
+        grab_stats, reduce_stats = self.pipeline['grab'], self.pipeline['reduce']
+        convert_stats = self.pipeline['convert']
+        last_report = time.perf_counter()
+        self.pacer.reset()
+        try:
+            while self.pacer.wait(stop):
+                config = self.config
+                self.pacer.period = config.frame_period
+                if (config.smoothing, config.smoothing_strength) != filter_settings:
+                    filter_settings = (config.smoothing, config.smoothing_strength)
+                    temporal_filter = make_temporal_filter(*filter_settings)
+
+                start = time.perf_counter()
+                try:
+                    frame = self._grab(sampler, config)
+                    grabbed = time.perf_counter()
+                    colour = self._reduce(sampler, frame, config)
+                except Exception:  # noqa: BLE001 - logged, and the sync keeps trying
+                    self._capture_errors.exception("Screen capture failed")
+                    stop.wait(_CAPTURE_ERROR_BACKOFF)
+                    continue
+                reduced = time.perf_counter()
+
+                if temporal_filter is not None:
+                    colour = self._smooth(temporal_filter, colour)
+                if not config.colour_correction.identity:
+                    colour = self._correct(config.colour_correction, colour)
+                converted = time.perf_counter()
+                self.frames_captured += 1
+                self._slot.put(colour)
+
+                grab_stats.record(grabbed - start)
+                reduce_stats.record(reduced - grabbed)
+                convert_stats.record(converted - reduced)
+                if config.stats_interval and converted - last_report >= config.stats_interval:
+                    last_report = converted
+                    self._log_stats()
+        finally:
+            sampler.close()
+
+    def _send(self, colour: Colour) -> None:
+        if isinstance(colour, np.ndarray):
+            self.light_changer.change_colours(colour)
+        else:
+            self.light_changer.change_colour(*colour)
+
+    def _send_loop(self, stop: threading.Event) -> None:
+        send_stats = self.pipeline['send']
+        while not stop.is_set():
+            colour = self._slot.take(_SLOT_POLL_INTERVAL)
+            if colour is None or stop.is_set() or not self.change_gate.should_send(colour):
+                continue
+            start = time.perf_counter()
+            try:
+                self._send(colour)
+            except Exception:  # noqa: BLE001 - logged, and the sync keeps trying
+                self._send_errors.exception("Sending colour failed")
+                # Make sure the next colour is tried again
+                self.change_gate.reset()
+                continue
+            send_stats.record(time.perf_counter() - start)
+            self._sent_colours.debug("Sent colour %s", colour)
+
+        if self._restore_default:
+            try:
+                self.light_changer.default_colour()
+            except Exception:
+                logger.exception("Restoring default colour failed")
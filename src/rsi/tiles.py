@@ -0,0 +1,145 @@
+"""Incremental frame reduction with dirty-tile caching."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from rsi.sampling import OffsetMode, SamplingGrid, get_sampling_grid
+
+_BGRA_CHANNELS = 4
+_COLOUR_CHANNELS = 3
+
+
+class TileReducer:
+    """
+    Average frames incrementally, re-reducing only the tiles that changed.
+
+    The sampled frame, picked by the same grid and offset mode as
+    `ScreenSampler.sample`, is split into square tiles whose channel sums
+    are cached between frames. Each frame a cheap checksum of every
+    ``checksum_stride``'th pixel finds the dirty tiles, and only those are
+    summed again. When most tiles changed, or every ``full_refresh_interval``
+    frames to catch changes the checksum did not probe, all tiles are
+    summed in one vectorized pass instead.
+    """
+
+    def __init__(
+        self,
+        tile_size: int = 32,
+        checksum_stride: int = 4,
+        full_refresh_interval: int = 120,
+        full_refresh_ratio: float = 0.5,
+    ) -> None:
+        """Initialise tile reducer."""
+        if tile_size % checksum_stride:
+            msg = f"Tile size {tile_size} must be a multiple of the checksum stride {checksum_stride}."
+            raise ValueError(msg)
+        self.tile_size = tile_size
+        self.checksum_stride = checksum_stride
+        self.full_refresh_interval = full_refresh_interval
+        self.full_refresh_ratio = full_refresh_ratio
+        self.dirty_tiles = 0
+        """Number of tiles re-reduced for the last frame."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all cached tile sums."""
+        self._geometry: tuple[int, int, int, OffsetMode] | None = None
+        self._shape = (0, 0)
+        self._row_starts = np.empty(0, dtype=np.intp)
+        self._col_starts = np.empty(0, dtype=np.intp)
+        self._checksums = np.empty((0, 0), dtype=np.uint64)
+        self._tile_sums = np.empty((0, 0, _COLOUR_CHANNELS), dtype=np.uint64)
+        self._totals = np.zeros(_COLOUR_CHANNELS, dtype=np.uint64)
+        self._frames_until_refresh = 0
+
+    @property
+    def tile_count(self) -> int:
+        """Number of tiles in the current geometry."""
+        return self._row_starts.size * self._col_starts.size
+
+    def _setup(self, height: int, width: int) -> None:
+        """Lay out the tiles for a sampled frame geometry."""
+        self._row_starts = np.arange(0, height, self.tile_size, dtype=np.intp)
+        self._col_starts = np.arange(0, width, self.tile_size, dtype=np.intp)
+        tiles = (self._row_starts.size, self._col_starts.size)
+        self._checksums = np.zeros(tiles, dtype=np.uint64)
+        self._tile_sums = np.zeros((*tiles, _COLOUR_CHANNELS), dtype=np.uint64)
+        self._frames_until_refresh = 0
+
+    def _tile_checksums(self, probe: np.ndarray) -> np.ndarray:
+        """Sum a sparse probe of packed BGRA pixels per tile."""
+        step = self.checksum_stride
+        per_row = np.add.reduceat(probe, self._row_starts // step, axis=0, dtype=np.uint64)
+        return np.add.reduceat(per_row, self._col_starts // step, axis=1, dtype=np.uint64)
+
+    def _probe(self, frame: np.ndarray, grid: SamplingGrid, index_grid: np.ndarray | None) -> np.ndarray:
+        """Pick every ``checksum_stride``'th sampled pixel, packed into one uint32 each."""
+        step = self.checksum_stride
+        # One uint32 per BGRA pixel makes the checksum sensitive to every channel
+        packed = frame.view(np.uint32)
+        if index_grid is None:
+            return packed[::grid.row_stride * step, ::grid.col_stride * step, 0]
+        return packed.reshape(-1)[index_grid[::step, ::step]]
+
+    def reduce(
+        self,
+        frame: np.ndarray,
+        colour_precision: int,
+        offset_mode: OffsetMode = OffsetMode.PRIME,
+    ) -> tuple[int, int, int]:
+        """Average a contiguous BGRA frame into an RGB colour."""
+        grid = get_sampling_grid(frame.shape[0], frame.shape[1], colour_precision, offset_mode)
+        height, width = grid.shape
+        if not height * width:
+            return 0, 0, 0
+        # Offset grids are gathered through their indices, one tile at a time; plain grids are strided views
+        index_grid = None if grid.indices is None else grid.indices.reshape(height, width)
+        strided = frame[::grid.row_stride, ::grid.col_stride, :_COLOUR_CHANNELS]
+        pixels = frame.reshape(-1, _BGRA_CHANNELS)
+
+        geometry = (frame.shape[0], frame.shape[1], colour_precision, offset_mode)
+        if geometry != self._geometry:
+            self._setup(height, width)
+            self._geometry = geometry
+            self._shape = (height, width)
+
+        checksums = self._tile_checksums(self._probe(frame, grid, index_grid))
+        dirty = checksums != self._checksums
+        self._checksums = checksums
+        self._frames_until_refresh -= 1
+
+        if self._frames_until_refresh <= 0 or np.count_nonzero(dirty) > self.full_refresh_ratio * dirty.size:
+            sampled = strided if index_grid is None else pixels[index_grid, :_COLOUR_CHANNELS]
+            per_row = np.add.reduceat(sampled, self._row_starts, axis=0, dtype=np.uint64)
+            np.add.reduceat(per_row, self._col_starts, axis=1, dtype=np.uint64, out=self._tile_sums)
+            self._frames_until_refresh = self.full_refresh_interval
+            self.dirty_tiles = dirty.size
+        else:
+            size = self.tile_size
+            for row, col in np.argwhere(dirty):
+                tile = np.s_[row * size:(row + 1) * size, col * size:(col + 1) * size]
+                np.sum(
+                    strided[tile] if index_grid is None else pixels[index_grid[tile], :_COLOUR_CHANNELS],
+                    axis=(0, 1),
+                    dtype=np.uint64,
+                    out=self._tile_sums[row, col],
+                )
+            self.dirty_tiles = int(dirty.sum())
+
+        np.sum(self._tile_sums, axis=(0, 1), dtype=np.uint64, out=self._totals)
+        pixel_count = height * width
+        # Only the three reduced values need reordering from BGR to RGB
+        blue, green, red = (round(int(channel) / pixel_count) for channel in self._totals)
+        return red, green, blue
+
+    def tile_means(self) -> np.ndarray:
+        """Get the cached mean colour of every tile as a ``(rows, cols, 3)`` RGB array."""
+        size = self.tile_size
+        if self._geometry is None:
+            return np.empty((0, 0, _COLOUR_CHANNELS), dtype=np.uint8)
+        height, width = self._shape
+        rows = np.minimum(self._row_starts + size, height) - self._row_starts
+        cols = np.minimum(self._col_starts + size, width) - self._col_starts
+        counts = np.maximum(rows[:, None] * cols[None, :], 1)[..., None]
+        return np.rint(self._tile_sums[..., ::-1] / counts).astype(np.uint8)
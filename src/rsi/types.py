@@ -1,22 +1,46 @@
 """Type definitions."""
 
+from __future__ import annotations
+
 from enum import Enum
-from typing import Protocol
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class LightChanger(Protocol):
     """Protocol for changing light colours."""
 
+    keepalive: float | None
+    """Seconds after which an unchanged colour must be resent, if the device times out."""
+
     def change_colour(self, red: int, green: int, blue: int) -> None:
         """Set light colour."""
 
+    def change_colours(self, colours: np.ndarray) -> None:
+        """Set per-LED light colours from an ``(N, 3)`` RGB array."""
+
     def default_colour(self) -> None:
         """Set light colour to default."""
 
+    def close(self) -> None:
+        """Release the sockets, sessions and threads the light changer holds."""
+
 
 class Mode(str, Enum):
     """Light changer mode."""
 
     HOME_ASSISTANT = "homeassistant"
+    HOME_ASSISTANT_WS = "homeassistant_ws"
     WLED = "wled"
+    DDP = "ddp"
     YEELIGHT = "yeelight"
+    MULTI = "multi"
+
+
+class ColourMode(str, Enum):
+    """How a frame is reduced to a single colour."""
+
+    AVERAGE = "average"
+    DOMINANT = "dominant"
@@ -1,8 +1,9 @@
 """Miscellaneous utility functions."""
 
-from yeelight import discover_bulbs  # type: ignore[import-untyped]
-
 
 def find_bulbs() -> list[str]:
     """Get list of discovered bulb IP addresses."""
+    # yeelight is only needed once the user asks for discovery
+    from yeelight import discover_bulbs  # type: ignore[import-untyped]
+
     return [bulb['ip'] for bulb in discover_bulbs()]
@@ -3,68 +3,380 @@
 from __future__ import annotations
 
 import configparser
+import io
 import logging
-from typing import TYPE_CHECKING
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
-import rtoml  # noqa: F401
+import rtoml
 
-from rsi.config import RSI_CONFIG_FILE  # noqa: F401
+from rsi.config import CONFIG_FILE
+from rsi.types import Mode
+from rsi.watch import FileWatcher, file_signature
 
 if TYPE_CHECKING:
-    from rsi.types import Mode
+    from collections.abc import Callable
+    from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+_WRITE_DELAY = 0.5  # seconds of quiet before changes are written
+_MAX_WRITE_DELAY = 2  # seconds a change may wait while more keep coming
+
+
+def _toml_value(value: str) -> Any:  # noqa: ANN401
+    """Give a config string its natural TOML type."""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+@dataclass(frozen=True)
+class ConfigChange:
+    """One option that changed; ``old`` or ``new`` is None if the option was added or removed."""
+
+    section: str
+    option: str
+    old: str | None
+    new: str | None
+
+
+def diff_config(old: configparser.ConfigParser, new: configparser.ConfigParser) -> list[ConfigChange]:
+    """List every option that differs between two configurations."""
+    changes = []
+    for section in sorted(set(old.sections()) | set(new.sections())):
+        old_options = dict(old[section]) if old.has_section(section) else {}
+        new_options = dict(new[section]) if new.has_section(section) else {}
+        changes.extend(
+            ConfigChange(section, option, old_options.get(option), new_options.get(option))
+            for option in sorted(old_options.keys() | new_options.keys())
+            if old_options.get(option) != new_options.get(option)
+        )
+    return changes
+
 
 class ConfigurationManager:
-    def __init__(self) -> None:
+    """
+    Keep the configuration in memory and write it back in the background.
+
+    The file is read once; reads after that never touch the disk. Writes
+    update the in-memory config and mark it dirty, and the file is rewritten
+    once changes stop coming in (a dragged slider saves once, not per
+    event). Files are replaced atomically, so a crash never leaves a
+    half-written config. A ``.toml`` path is stored as TOML, anything else
+    as INI.
+
+    Subscribers get a list of `ConfigChange` for every write, and, once
+    `watch` is called, for edits made to the file by anything else.
+    """
+
+    def __init__(self, path: Path = CONFIG_FILE) -> None:
+        """Initialise configuration manager for a config file."""
+        self.path = path
         self.config = configparser.ConfigParser()
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        # Saves run outside the config lock, so reads never wait on the disk; this only orders the saves
+        self._write_lock = threading.Lock()
+        self._generation = 0
+        self._written_generation = 0
+        self._writer: threading.Thread | None = None
+        self._first_change: float | None = None
+        self._deadline: float | None = None
+        self._subscribers: list[Callable[[list[ConfigChange]], None]] = []
+        self._watcher: FileWatcher | None = None
+        self._written_signature: tuple[int, int, int] | None = None
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are changes not yet written to disk."""
+        return self._dirty
+
+    # Reading
+
+    def read(self) -> configparser.ConfigParser:
+        """Get the configuration, reading it from disk only the first time."""
+        with self._lock:
+            if not self._loaded:
+                self.reload()
+            return self.config
+
+    def _load(self) -> configparser.ConfigParser:
+        config = configparser.ConfigParser()
+        if self.path.suffix == '.toml':
+            config.read_dict(rtoml.load(self.path))
+        elif not config.read(self.path):
+            raise FileNotFoundError(self.path)
+        return config
+
+    def reload(self) -> configparser.ConfigParser:
+        """Read configuration to memory, replacing unsaved changes."""
+        with self._lock:
+            try:
+                config = self._load()
+            except FileNotFoundError:
+                logger.warning('Reading config failed, writing new config instead.')
+                return self._reset()
+            except (OSError, rtoml.TomlParsingError, configparser.Error):
+                logger.exception('Reading config failed, writing new config instead.')
+                return self._reset()
+            changes = diff_config(self.config, config) if self._loaded else []
+            self.config = config
+            self._loaded = True
+            self._dirty = False
+        self._publish(changes)
+        return config
+
+    def _reset(self) -> configparser.ConfigParser:
+        self.config = configparser.ConfigParser()
+        self._loaded = True
+        self.default()
+        self.flush()
+        return self.config
+
+    def get_str(self, section: str, option: str, fallback: str = '') -> str:
+        """Get an option as a string."""
+        return self.read().get(section, option, fallback=fallback)
+
+    def get_int(self, section: str, option: str, fallback: int = 0) -> int:
+        """Get an option as an integer."""
+        return self.read().getint(section, option, fallback=fallback)
 
-    def writeMode(self, mode: Mode) -> None:
-        self.config['MODE'] = {'mode': mode}
-        with open('config.ini', 'w+') as configfile:
-            self.config.write(configfile)
+    def get_float(self, section: str, option: str, fallback: float = 0.0) -> float:
+        """Get an option as a float."""
+        return self.read().getfloat(section, option, fallback=fallback)
 
-    def writeHAConfig(self, home_assistant_ip, home_assistant_port) -> None:
-        self.config['HOME ASSISTANT'] = {'home_assistant_ip': home_assistant_ip, 'home_assistant_port': home_assistant_port}
-        with open('config.ini', 'w+') as configfile:
-            self.config.write(configfile)
+    def get_bool(self, section: str, option: str, *, fallback: bool = False) -> bool:
+        """Get an option as a boolean."""
+        return self.read().getboolean(section, option, fallback=fallback)
 
-    def writeYeelightConfig(self, yeelight_ip) -> None:
-        self.config['YEELIGHT'] = {'yeelight_ip': yeelight_ip}
-        with open('config.ini', 'w+') as configfile:
-            self.config.write(configfile)
+    # Writing
 
-    def writeWLEDConfig(self, wled_ip) -> None:
-        self.config['WLED'] = {'wled_ip': wled_ip}
-        with open('config.ini', 'w+') as configfile:
-            self.config.write(configfile)
+    def update(self, section: str, values: dict[str, Any]) -> None:
+        """Merge options into a section, scheduling a write if anything changed."""
+        with self._lock:
+            config = self.read()
+            changes = [
+                ConfigChange(section, option, config.get(section, option, fallback=None), str(value))
+                for option, value in values.items()
+                if config.get(section, option, fallback=None) != str(value)
+            ]
+            if not changes and config.has_section(section):
+                return
+            config.read_dict({section: {change.option: change.new for change in changes}})
+            self._mark_dirty()
+        self._publish(changes)
 
-    def writeAdvancedConfig(self, refresh_rate, color_precision) -> None:
-        self.config['ADVANCED'] = {'refresh_rate': refresh_rate, 'color_precision': color_precision}
-        with open('config.ini', 'w+') as configfile:
-            self.config.write(configfile)
+    def _mark_dirty(self) -> None:
+        # Called holding the lock; the deadline only ever moves later, so the writer just re-checks it on waking
+        now = time.monotonic()
+        self._dirty = True
+        if self._first_change is None:
+            self._first_change = now
+            self._changed.notify()
+        self._deadline = min(now + _WRITE_DELAY, self._first_change + _MAX_WRITE_DELAY)
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name='rsi-config-writer', daemon=True)
+            self._writer.start()
 
-    def writeUIConfig(self, theme) -> None:
-        self.config['UI'] = {'theme': theme}
-        with open('config.ini', 'w+') as configfile:
-            self.config.write(configfile)
+    def _write_loop(self) -> None:
+        while True:
+            with self._lock:
+                if self._writer is not threading.current_thread():
+                    return
+                if self._deadline is None:
+                    self._changed.wait()
+                    continue
+                if (remaining := self._deadline - time.monotonic()) > 0:
+                    self._changed.wait(remaining)
+                    continue
+            self.flush()
+
+    def _serialise(self) -> str:
+        if self.path.suffix == '.toml':
+            return rtoml.dumps({
+                section: {option: _toml_value(value) for option, value in self.config[section].items()}
+                for section in self.config.sections()
+            })
+        buffer = io.StringIO()
+        self.config.write(buffer)
+        return buffer.getvalue()
+
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        with self._lock:
+            self._first_change = None
+            self._deadline = None
+            if not self._dirty:
+                return
+            text = self._serialise()
+            # Changes made while the file is written mark the config dirty again
+            self._dirty = False
+            self._generation += 1
+            generation = self._generation
+
+        with self._write_lock:
+            if generation < self._written_generation:
+                return  # a newer snapshot has already been saved
+            temporary = self.path.with_name(f".{self.path.name}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with temporary.open('w', encoding='utf-8') as file:
+                    file.write(text)
+                    file.flush()
+                    os.fsync(file.fileno())
+                temporary.replace(self.path)
+                self._written_signature = file_signature(self.path)
+            except OSError:
+                logger.exception("Saving config to %s failed", self.path)
+                self._dirty = True
+            else:
+                self._written_generation = generation
+
+    # Change notification
+
+    def subscribe(self, callback: Callable[[list[ConfigChange]], None]) -> None:
+        """Call back with the changed options whenever the configuration changes."""
+        self._subscribers.append(callback)
+
+    def _publish(self, changes: list[ConfigChange]) -> None:
+        if not changes:
+            return
+        for callback in self._subscribers:
+            try:
+                callback(changes)
+            except Exception:  # noqa: PERF203
+                logger.exception("Applying config changes failed")
+
+    def watch(self, poll_interval: float = 1.0) -> None:
+        """Reload the configuration whenever its file is changed by something else."""
+        if self._watcher is None:
+            self._watcher = FileWatcher(self.path, self._file_changed, poll_interval)
+        self._watcher.start()
+
+    def _file_changed(self) -> None:
+        signature = file_signature(self.path)
+        # Ignore our own saves, and files caught mid-replace
+        if signature is None or signature == self._written_signature:
+            return
+        logger.info("%s changed on disk, reloading", self.path)
+        self.reload()
+
+    def close(self) -> None:
+        """Stop watching and write any pending changes before exiting."""
+        if self._watcher is not None:
+            self._watcher.stop()
+        with self._lock:
+            writer, self._writer = self._writer, None
+            self._changed.notify_all()
+        if writer is not None:
+            writer.join()
+        self.flush()
+
+    def writeMode(self, mode: Mode | str) -> None:  # noqa: N802
+        """Set the light changer mode."""
+        self.update('MODE', {'mode': getattr(mode, 'value', mode)})
+
+    def writeHAConfig(  # noqa: N802
+        self,
+        home_assistant_ip: str,
+        home_assistant_port: str | int,
+        access_token: str | None = None,
+        light_entity_id: str | None = None,
+    ) -> None:
+        """Set the Home Assistant address, and the WebSocket credentials if given."""
+        section: dict[str, Any] = {'home_assistant_ip': home_assistant_ip, 'home_assistant_port': home_assistant_port}
+        # The WebSocket mode also needs a token and an entity; keep them when the webhook mode saves
+        if access_token is not None:
+            section['access_token'] = access_token
+        if light_entity_id is not None:
+            section['light_entity_id'] = light_entity_id
+        self.update('HOME ASSISTANT', section)
+
+    def writeYeelightConfig(self, yeelight_ip: str) -> None:  # noqa: N802
+        """Set the Yeelight bulb address."""
+        self.update('YEELIGHT', {'yeelight_ip': yeelight_ip})
+
+    def writeWLEDConfig(self, wled_ip: str, led_count: str | int | None = None) -> None:  # noqa: N802
+        """Set the WLED address and strip length."""
+        section: dict[str, Any] = {'wled_ip': wled_ip}
+        if led_count is not None:
+            section['led_count'] = led_count
+        self.update('WLED', section)
+
+    def writeDDPConfig(self, ddp_ip: str, led_count: str | int | None = None) -> None:  # noqa: N802
+        """Set the DDP receiver address and pixel count."""
+        section: dict[str, Any] = {'ddp_ip': ddp_ip}
+        if led_count is not None:
+            section['led_count'] = led_count
+        self.update('DDP', section)
+
+    def writeMultiConfig(self, devices: str) -> None:  # noqa: N802
+        """Set the device sections synced in multi mode."""
+        self.update('MULTI', {'devices': devices})
+
+    def writeAdvancedConfig(  # noqa: N802
+        self,
+        refresh_rate: str | int,
+        color_precision: str | int,
+        color_mode: str = 'average',
+    ) -> None:
+        """Set the capture options shown in the main window."""
+        self.update('ADVANCED', {
+            'refresh_rate': refresh_rate,
+            'color_precision': color_precision,
+            'color_mode': color_mode,
+        })
+
+    def writeColourCorrectionConfig(  # noqa: N802
+        self,
+        gamma: str | float,
+        white_balance: str,
+        max_brightness: str | int,
+    ) -> None:
+        """Set the output colour correction."""
+        self.update('ADVANCED', {
+            'gamma': gamma,
+            'white_balance': white_balance,
+            'max_brightness': max_brightness,
+        })
+
+    def writeZonesConfig(  # noqa: N802
+        self,
+        left: str | int,
+        top: str | int,
+        right: str | int,
+        bottom: str | int,
+        depth: str | int,
+    ) -> None:
+        """Set the number of LEDs along each screen edge."""
+        self.update('ZONES', {'left': left, 'top': top, 'right': right, 'bottom': bottom, 'depth': depth})
+
+    def writeUIConfig(self, theme: str) -> None:  # noqa: N802
+        """Set the GUI theme."""
+        self.update('UI', {'theme': theme})
 
     def default(self) -> None:
-        self.writeMode('WLED')
-        self.writeHAConfig('192.168.1.123', '8123') # Default home assistant values
+        """Reset every option to its default value."""
+        self.writeMode(Mode.WLED)
+        self.writeHAConfig('192.168.1.123', '8123', '', 'light.living_room') # Default home assistant values
         self.writeYeelightConfig('192.168.1.200') # Random made up IP
-        self.writeWLEDConfig('192.168.1.229') # Random made up IP
+        self.writeWLEDConfig('192.168.1.229', '256') # Random made up IP
+        self.writeDDPConfig('192.168.1.229', '256') # Random made up IP
+        self.writeMultiConfig('WLED, YEELIGHT') # Section names of the devices synced in multi mode
         self.writeAdvancedConfig('0', '50')
+        self.update('ADVANCED', {'change_threshold': '1.0', 'target_fps': '0', 'smoothing': 'none'})
+        self.update('ADVANCED', {'stats_interval': '60', 'metrics_port': '0'}) # Stats logged every minute, no endpoint
+        self.writeColourCorrectionConfig('1.0', '1.0, 1.0, 1.0', '100')
+        self.writeZonesConfig('0', '0', '0', '0', '10') # Zone mode off
         self.writeUIConfig('reddit')
-
-    def read(self) -> configparser.ConfigParser:
-        """Read configuration to memory."""
-        try:
-            if not self.config.read('config.ini'):
-                logger.warning('Reading config failed, writing new config instead.')
-                self.default()
-        except OSError:
-            logger.exception('Reading config failed, writing new config instead.')
-            self.default()
-        return self.config
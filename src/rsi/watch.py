@@ -0,0 +1,147 @@
+"""Watch a file for changes."""
+
+from __future__ import annotations
+
+import contextlib
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# From <sys/inotify.h>
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len; followed by len bytes of name
+
+_SETTLE_TIME = 0.1  # seconds to wait for more events before reporting a change
+
+
+def file_signature(path: Path) -> tuple[int, int, int] | None:
+    """Get what identifies a version of a file, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _inotify_fd(directory: Path) -> int | None:
+    """Open an inotify descriptor watching a directory, or None where inotify is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    libc_name = ctypes.util.find_library('c')
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    # Watch the directory, as atomic saves replace the file with a new inode
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class FileWatcher:
+    """
+    Call back when a file changes, from a background thread.
+
+    Uses inotify on Linux, so a change is seen almost immediately without
+    any polling cost. Elsewhere, or if inotify cannot be set up, the file's
+    inode, modification time and size are compared every ``poll_interval``
+    seconds. Bursts of events, such as an editor's save, are reported once.
+    """
+
+    def __init__(self, path: Path, callback: Callable[[], None], poll_interval: float = 1.0) -> None:
+        """Initialise file watcher."""
+        self.path = path
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the watcher is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start watching, if not already watching."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rsi-config-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_interval + 1)
+            self._thread = None
+
+    def _notify(self) -> None:
+        try:
+            self.callback()
+        except Exception:
+            logger.exception("Handling a change to %s failed", self.path)
+
+    def _run(self) -> None:
+        fd = _inotify_fd(self.path.parent.resolve())
+        if fd is None:
+            logger.debug("inotify unavailable, polling %s", self.path)
+            self._poll()
+            return
+        try:
+            self._watch(fd)
+        finally:
+            os.close(fd)
+
+    def _read_names(self, fd: int) -> set[bytes]:
+        names = set()
+        with contextlib.suppress(BlockingIOError):
+            while True:
+                data = os.read(fd, 4096)
+                offset = 0
+                while offset < len(data):
+                    _, _, _, length = _IN_EVENT.unpack_from(data, offset)
+                    offset += _IN_EVENT.size
+                    names.add(data[offset:offset + length].rstrip(b'\0'))
+                    offset += length
+        return names
+
+    def _watch(self, fd: int) -> None:
+        name = os.fsencode(self.path.name)
+        while not self._stop.is_set():
+            readable, _, _ = select.select([fd], [], [], self.poll_interval)
+            if not readable or name not in self._read_names(fd):
+                continue
+            # Let the writer finish, and fold the rest of the burst into this change
+            while select.select([fd], [], [], _SETTLE_TIME)[0]:
+                self._read_names(fd)
+            self._notify()
+
+    def _poll(self) -> None:
+        signature = file_signature(self.path)
+        while not self._stop.wait(self.poll_interval):
+            current = file_signature(self.path)
+            if current != signature:
+                signature = current
+                self._notify()
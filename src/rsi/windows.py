@@ -2,23 +2,46 @@
 
 from __future__ import annotations
 
+import dataclasses
 import logging
+import sys
 import time
 from typing import TYPE_CHECKING
 
 import PySimpleGUI as sg  # type: ignore[import-untyped]  # noqa: N813
-import yeelight  # type: ignore[import-untyped]
 
-from rsi.colour import get_average_screen_colour, get_screens_list
-from rsi.types import Mode
+from rsi.colour import get_screens_list
+from rsi.live import LiveReloader, sync_settings
+from rsi.metrics import start_metrics_server
+from rsi.sync import SyncEngine
+from rsi.types import ColourMode, Mode
 from rsi.utils import find_bulbs
 
 if TYPE_CHECKING:
+    from typing import Any
+
     from rsi.light_changer import LightChangerResolver
-    from rsi.utils_.ConfigurationManager import ConfigurationManager
+    from rsi.utils_.ConfigurationManager import ConfigChange, ConfigurationManager
 
 logger = logging.getLogger(__name__)
 
+STATS_REFRESH = 1000  # milliseconds between updates of the stats line while syncing
+
+
+def stats_text(stats: dict[str, Any]) -> str:
+    """Summarise sync statistics on one line for the main window."""
+    if not stats['running']:
+        return 'Not syncing.'
+    stages = ', '.join(f"{stage} {summary['p95_ms']:.1f}" for stage, summary in stats['stages'].items())
+    return f"{stats['fps']:.1f} fps, {stats['frames_dropped']} dropped | p95 ms: {stages}"
+
+
+def _connection_errors() -> tuple[type[Exception], ...]:
+    """Errors a failed test colour may raise; yeelight's can only come up once its backend is loaded."""
+    yeelight = sys.modules.get('yeelight')
+    return (OSError,) if yeelight is None else (yeelight.BulbException, OSError)
+
+
 class MainWindow:
     """Main window."""
 
@@ -30,10 +53,34 @@ def __init__(self,
         self.config_manager = config_manager
         self.settings_window = settings_window
         self.light_changer_resolver = light_changer_resolver
-        self.light_changer = self.light_changer_resolver.get_light_changer()
         self.screens_list = get_screens_list()
-
-    def render_layout(self, theme: str, refresh_rate: int, colour_precision: int) -> sg.Window:
+        self.sync_engine = SyncEngine(self.light_changer_resolver.get_light_changer())
+        self.live_reloader = LiveReloader(config_manager, light_changer_resolver, self.sync_engine)
+        self.window: sg.Window | None = None
+        self.metrics_server = start_metrics_server(config_manager, self.sync_engine.stats)
+        # Edits to the config file reach the sync directly; the GUI only refreshes its controls
+        config_manager.subscribe(self._config_changed)
+        config_manager.watch()
+
+    def _config_changed(self, _changes: list[ConfigChange]) -> None:
+        if self.window is not None:
+            self.window.write_event_value('CONFIG-CHANGED', None)
+
+    def _restore_default(self) -> None:
+        # An offline device must not take the window down with it
+        try:
+            self.sync_engine.light_changer.default_colour()
+        except _connection_errors():
+            logger.exception("Restoring default colour failed")
+
+    def render_layout(
+        self,
+        theme: str,
+        refresh_rate: int,
+        colour_precision: int,
+        colour_mode: ColourMode,
+        max_brightness: int = 100,
+    ) -> sg.Window:
         """Create UI elements."""
         sg.theme(theme)
 
@@ -46,9 +93,10 @@ def render_layout(self, theme: str, refresh_rate: int, colour_precision: int) ->
                 ),
                 sg.Slider(
                     range=(1, 100),
-                    default_value=100,
+                    default_value=max_brightness,
                     orientation='horizontal',
                     key="MAX-BRIGHTNESS",
+                    enable_events=True,
                     tooltip='The max brightness of the screen. When "Vary Brightess" is off,\
                           this change be the lamp brightness.',
                 ),
@@ -86,6 +134,14 @@ def render_layout(self, theme: str, refresh_rate: int, colour_precision: int) ->
                     tooltip='The precision of the color capture. Lower values are faster (less CPU)\
                           but less accurate.',
                     ),
+                sg.Combo(
+                    values=[mode.value for mode in ColourMode],
+                    default_value=colour_mode.value,
+                    auto_size_text=True,
+                    enable_events=True,
+                    key='COLOR-MODE',
+                    tooltip='Average blends the whole screen, dominant picks its most common colour.',
+                ),
             ],
             [
                 sg.Text(
@@ -97,12 +153,20 @@ def render_layout(self, theme: str, refresh_rate: int, colour_precision: int) ->
                     default_value=self.screens_list[0],
                     disabled=len(self.screens_list) <= 2,  # noqa: PLR2004
                     auto_size_text=True,
+                    enable_events=True,
                     key='SCREENS-LIST',
                 ),
                 sg.Button(
                     'Refresh Screens',
                     tooltip='Use this to refresh the screen list when connecting / disconnecting screens.',
                 ),
+                sg.Checkbox(
+                    'Crop Black Bars',
+                    default=self.sync_engine.config.crop_black_bars,
+                    enable_events=True,
+                    key='CROP-BARS',
+                    tooltip='Ignores letterbox and pillarbox bars when capturing movies.',
+                ),
                 sg.Text(
                     'UI Theme:',
                     tooltip='The theme for the UI (I personally recommend HotDogStand).',
@@ -121,6 +185,14 @@ def render_layout(self, theme: str, refresh_rate: int, colour_precision: int) ->
                 sg.Button('Stop', tooltip = 'Stops the light sync and goes back to default lighting.'),
                 sg.Button('Settings', tooltip = 'Configure app settings.'),
             ],
+            [
+                sg.Text(
+                    stats_text(self.sync_engine.stats()),
+                    key='STATS',
+                    size=(80, 1),
+                    tooltip='Frame rate, dropped colours and 95th percentile time of each sync stage.',
+                ),
+            ],
         ]
 
         # Create the Window
@@ -128,65 +200,111 @@ def render_layout(self, theme: str, refresh_rate: int, colour_precision: int) ->
 
     def show_main_window(self) -> None:  # noqa: C901
         """Display the main window."""
-        config = self.config_manager.read()
-
-        refresh_rate = int(config.get('ADVANCED', fallback={}).get('refresh_rate', fallback=0))
-        colour_precision = int(config.get('ADVANCED', fallback={}).get('color_precision', fallback=20))
-        self.config_manager.writeAdvancedConfig(refresh_rate, colour_precision)
-
-        theme = config.get('UI', fallback={}).get('theme', fallback='reddit')
+        settings = sync_settings(self.config_manager)
+        refresh_rate = settings['refresh_rate']
+        colour_precision = settings['colour_precision']
+        colour_mode = settings['colour_mode']
+        colour_correction = settings['colour_correction']
+        self.config_manager.writeAdvancedConfig(refresh_rate, colour_precision, colour_mode.value)
+
+        theme = self.config_manager.get_str('UI', 'theme', 'reddit')
         self.config_manager.writeUIConfig(theme)
 
+        self.sync_engine.update_config(**settings)
+        max_brightness = round(colour_correction.max_brightness * 100)
 
-        window = self.render_layout(theme, refresh_rate, colour_precision)
-        running = False # Wether the light sync is running or not
+        window = self.window = self.render_layout(theme, refresh_rate, colour_precision, colour_mode, max_brightness)
 
         while True:
-            # I recommend using 150ms for YeeLight Mode and 1000ms on HA mode (higher latency)
-            event, values = window.read(refresh_rate)
+            # The sync runs on its own threads, so the GUI only waits for events and refreshes the stats
+            event, values = window.read(timeout=STATS_REFRESH if self.sync_engine.running else None)
             # print(event, values) # Shows GUI state (for debugging)  # noqa: ERA001
             # max_br = values["MAX-BRIGHTNESS"]  # noqa: ERA001
             # vary_br = values["VARY-BRIGHTNESS"]  # noqa: ERA001
-            sc = self.screens_list.index(values['SCREENS-LIST'])
-
-            if event == 'Start': # if user clicks start
-                running = True
 
             if event == sg.WIN_CLOSED: # if user closes window
-                self.light_changer.default_colour()
+                self.window = None
+                if self.metrics_server is not None:
+                    self.metrics_server.close()
+                if self.sync_engine.running:
+                    self.sync_engine.close()
+                else:
+                    self._restore_default()
                 break
 
+            if event == 'Start': # if user clicks start
+                self.sync_engine.start()
+
             if event == 'Stop': # if user clicks stop
-                self.light_changer.default_colour()
-                running = False
+                if self.sync_engine.running:
+                    self.sync_engine.stop()
+                else:
+                    self._restore_default()
+
+            if event in (sg.TIMEOUT_KEY, 'Start', 'Stop'): # if the stats are due or the sync started or stopped
+                window['STATS'].update(value=stats_text(self.sync_engine.stats()))
+
+            if event == 'SCREENS-LIST': # if user picks a screen
+                self.sync_engine.update_config(monitor_num=self.screens_list.index(values['SCREENS-LIST']))
 
             if event == 'Refresh Screens': # if user clicks Refresh Screens
                 self.screens_list = get_screens_list()
+                self.sync_engine.refresh_screens()
+                self.sync_engine.update_config(monitor_num=0)
                 window.Element('SCREENS-LIST').update(values = self.screens_list, set_to_index = [0])
                 window.Element('SCREENS-LIST').update(disabled = len(self.screens_list) == 2)  # noqa: PLR2004
 
+            if event == 'CROP-BARS': # if user toggles black bar cropping
+                self.sync_engine.update_config(crop_black_bars=values['CROP-BARS'])
+
             if event == 'Settings': # if user clicks Settings
+                # Saved settings reach the sync engine through the live reloader
                 self.settings_window.show_settings_window()
-                self.light_changer = self.light_changer_resolver.get_light_changer()
 
             if event == 'REFRESH-RATE': # if user changes refresh rate
                 refresh_rate = int(values['REFRESH-RATE'])
-                self.config_manager.writeAdvancedConfig(refresh_rate, colour_precision)
+                self.sync_engine.update_config(refresh_rate=refresh_rate)
+                self.config_manager.writeAdvancedConfig(refresh_rate, colour_precision, colour_mode.value)
 
             if event == 'COLOR-PRECISION': # if user changes color precision
                 colour_precision = int(values['COLOR-PRECISION'])
-                self.config_manager.writeAdvancedConfig(refresh_rate, colour_precision)
+                self.sync_engine.update_config(colour_precision=colour_precision)
+                self.config_manager.writeAdvancedConfig(refresh_rate, colour_precision, colour_mode.value)
+
+            if event == 'COLOR-MODE': # if user changes color mode
+                colour_mode = ColourMode(values['COLOR-MODE'])
+                self.sync_engine.update_config(colour_mode=colour_mode)
+                self.config_manager.writeAdvancedConfig(refresh_rate, colour_precision, colour_mode.value)
+
+            if event == 'MAX-BRIGHTNESS': # if user moves the brightness slider
+                max_brightness = int(values['MAX-BRIGHTNESS'])
+                colour_correction = dataclasses.replace(colour_correction, max_brightness=max_brightness / 100)
+                self.sync_engine.update_config(colour_correction=colour_correction)
+                self.config_manager.writeColourCorrectionConfig(
+                    colour_correction.gamma,
+                    ', '.join(str(gain) for gain in colour_correction.white_balance),
+                    max_brightness,
+                )
+
+            if event == 'CONFIG-CHANGED': # if the config changed, possibly outside the GUI
+                settings = sync_settings(self.config_manager)
+                refresh_rate = settings['refresh_rate']
+                colour_precision = settings['colour_precision']
+                colour_mode = settings['colour_mode']
+                colour_correction = settings['colour_correction']
+                max_brightness = round(colour_correction.max_brightness * 100)
+                window['REFRESH-RATE'].update(value=refresh_rate)
+                window['COLOR-PRECISION'].update(value=colour_precision)
+                window['COLOR-MODE'].update(value=colour_mode.value)
+                window['MAX-BRIGHTNESS'].update(value=max_brightness)
 
             if event == 'THEME': # if user changes theme
                 theme = values['THEME']
                 self.config_manager.writeUIConfig(theme)
                 window.close()
-                window = self.render_layout(theme, refresh_rate, colour_precision)
-
-            if running:
-                avg = get_average_screen_colour(sc, colour_precision)
-                rgb = avg[0], avg[1], avg[2]
-                self.light_changer.change_colour(*rgb)
+                window = self.window = self.render_layout(
+                    theme, refresh_rate, colour_precision, colour_mode, max_brightness,
+                )
 
         window.close()
 
@@ -198,22 +316,20 @@ def __init__(self, config_manager : ConfigurationManager, light_changer_resolver
         """Initialise settings screen."""
         self.config_manager = config_manager
         self.light_changer_resolver = light_changer_resolver
-        self.light_changer = self.light_changer_resolver.get_light_changer()
         self.default_yeelight_ips = ['Press Discover to find bulbs!']
 
     def render_layout(self) -> sg.Window:
         """Create settings window layout."""
-        config = self.config_manager.read()
-
-        mode = config['MODE']['mode']
-        home_assistant_ip = config['HOME ASSISTANT']['home_assistant_ip']
-        home_assistant_port = config['HOME ASSISTANT']['home_assistant_port']
-        yeelight_ip = config['YEELIGHT']['yeelight_ip']
-        wled_ip = config['WLED']['wled_ip']
+        get = self.config_manager.get_str
+        mode = get('MODE', 'mode')
+        home_assistant_ip = get('HOME ASSISTANT', 'home_assistant_ip')
+        home_assistant_port = get('HOME ASSISTANT', 'home_assistant_port')
+        yeelight_ip = get('YEELIGHT', 'yeelight_ip')
+        wled_ip = get('WLED', 'wled_ip')
 
         mode_config_layout = []
 
-        if mode == Mode.HOME_ASSISTANT:
+        if mode in (Mode.HOME_ASSISTANT, Mode.HOME_ASSISTANT_WS):
             mode_config_layout = [
                 [
                     sg.Text('Home Assistant IP', tooltip = 'The local address of your Home Assistant.'),
@@ -224,6 +340,30 @@ def render_layout(self) -> sg.Window:
                     sg.InputText(default_text = home_assistant_port, key = 'HOME-ASSISTANT-PORT'),
                 ],
             ]
+            if mode == Mode.HOME_ASSISTANT_WS:
+                mode_config_layout += [
+                    [
+                        sg.Text(
+                            'Access Token:',
+                            tooltip = 'A long-lived access token from your Home Assistant profile.',
+                        ),
+                        sg.InputText(
+                            default_text = get('HOME ASSISTANT', 'access_token'),
+                            password_char = '*',  # noqa: S106
+                            key = 'HOME-ASSISTANT-TOKEN',
+                        ),
+                    ],
+                    [
+                        sg.Text(
+                            'Light Entity:',
+                            tooltip = 'The entity ID of the light to sync, e.g. light.living_room.',
+                        ),
+                        sg.InputText(
+                            default_text = get('HOME ASSISTANT', 'light_entity_id'),
+                            key = 'HOME-ASSISTANT-ENTITY',
+                        ),
+                    ],
+                ]
         elif mode == Mode.YEELIGHT:
             mode_config_layout = [
                 [
@@ -250,6 +390,31 @@ def render_layout(self) -> sg.Window:
                     sg.Text('WLED IP', tooltip = 'The local address of your WLED instance.'),
                     sg.InputText(default_text = wled_ip, key = 'WLED-IP'),
                 ],
+                [
+                    sg.Text('LED Count', tooltip = 'The number of LEDs on your strip.'),
+                    sg.InputText(default_text = get('WLED', 'led_count', '256'), key = 'WLED-LED-COUNT'),
+                ],
+            ]
+        elif mode == Mode.DDP:
+            mode_config_layout = [
+                [
+                    sg.Text('DDP IP', tooltip = 'The local address of your DDP receiver.'),
+                    sg.InputText(default_text = get('DDP', 'ddp_ip'), key = 'DDP-IP'),
+                ],
+                [
+                    sg.Text('LED Count', tooltip = 'The number of pixels on your installation.'),
+                    sg.InputText(default_text = get('DDP', 'led_count', '256'), key = 'DDP-LED-COUNT'),
+                ],
+            ]
+        elif mode == Mode.MULTI:
+            mode_config_layout = [
+                [
+                    sg.Text(
+                        'Devices',
+                        tooltip = 'Comma-separated config.ini sections of the devices to sync, e.g. WLED, YEELIGHT.',
+                    ),
+                    sg.InputText(default_text = get('MULTI', 'devices'), key = 'MULTI-DEVICES'),
+                ],
             ]
 
         modes = [mode.value for mode in Mode]
@@ -304,23 +469,35 @@ def show_settings_window(self) -> None:  # noqa: C901
                     home_assistant_ip = values['HOME-ASSISTANT-IP']
                     home_assistant_port = values['HOME-ASSISTANT-PORT']
                     self.config_manager.writeHAConfig(home_assistant_ip, home_assistant_port)
+                elif mode == Mode.HOME_ASSISTANT_WS:
+                    self.config_manager.writeHAConfig(
+                        values['HOME-ASSISTANT-IP'],
+                        values['HOME-ASSISTANT-PORT'],
+                        values['HOME-ASSISTANT-TOKEN'],
+                        values['HOME-ASSISTANT-ENTITY'],
+                    )
                 elif mode == Mode.YEELIGHT:
                     yeelight_ip = values['YEELIGHT-IP']
                     self.config_manager.writeYeelightConfig(yeelight_ip)
                 elif mode == Mode.WLED:
                     wled_ip = values['WLED-IP']
-                    self.config_manager.writeYeelightConfig(wled_ip)
+                    self.config_manager.writeWLEDConfig(wled_ip, values['WLED-LED-COUNT'])
+                elif mode == Mode.DDP:
+                    self.config_manager.writeDDPConfig(values['DDP-IP'], values['DDP-LED-COUNT'])
+                elif mode == Mode.MULTI:
+                    self.config_manager.writeMultiConfig(values['MULTI-DEVICES'])
 
-                self.light_changer = self.light_changer_resolver.get_light_changer()
+                # The saves above already reached the sync through the live reloader; test what it now uses
+                light_changer = self.light_changer_resolver.get_light_changer()
 
                 try:
                     logger.info("Testing Configuration")
-                    self.light_changer.change_colour(0, 255, 0)
+                    light_changer.change_colour(0, 255, 0)
                     time.sleep(1)
-                    self.light_changer.default_colour()
+                    light_changer.default_colour()
                     break
-                except (yeelight.BulbException, OSError):
-                    if mode == Mode.HOME_ASSISTANT:
+                except _connection_errors():
+                    if mode in (Mode.HOME_ASSISTANT, Mode.HOME_ASSISTANT_WS):
                         sg.popup(
                             'Reaching Home Assistant failed!',
                             'Validate your IP and Port and make sure your webhooks are configured correctly!',
@@ -335,5 +512,15 @@ def show_settings_window(self) -> None:  # noqa: C901
                             'Reaching WLED failed!',
                             'Validate your IP and make sure your WLED instance is on!',
                         )
+                    elif mode == Mode.DDP:
+                        sg.popup(
+                            'Reaching the DDP receiver failed!',
+                            'Validate your IP and make sure the receiver is on!',
+                        )
+                    elif mode == Mode.MULTI:
+                        sg.popup(
+                            'Reaching every device failed!',
+                            'Check the sections listed under Devices and make sure the devices are on!',
+                        )
 
         window.close()
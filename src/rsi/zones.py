@@ -0,0 +1,128 @@
+"""Edge zones for multi-LED (ambilight) output."""
+
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from rsi.sampling import get_strides
+
+if TYPE_CHECKING:
+    from configparser import SectionProxy
+
+_COLOUR_CHANNELS = 3
+
+
+@dataclass(frozen=True)
+class ZoneLayout:
+    """
+    LED counts along each screen edge.
+
+    LEDs are numbered clockwise from the bottom left corner, the way most
+    strips are mounted behind a screen: left edge going up, top edge going
+    right, right edge going down and bottom edge going left.
+    """
+
+    left: int = 0
+    top: int = 0
+    right: int = 0
+    bottom: int = 0
+    depth: int = 10
+    """Depth of each edge band, in percent of the screen height or width."""
+
+    @classmethod
+    def from_config(cls: type[ZoneLayout], section: SectionProxy) -> ZoneLayout:
+        """Read a zone layout from the ``ZONES`` config section."""
+        return cls(
+            left=section.getint('left', fallback=0),
+            top=section.getint('top', fallback=0),
+            right=section.getint('right', fallback=0),
+            bottom=section.getint('bottom', fallback=0),
+            depth=section.getint('depth', fallback=10),
+        )
+
+    @property
+    def led_count(self) -> int:
+        """Total number of LEDs around the screen."""
+        return self.left + self.top + self.right + self.bottom
+
+    @property
+    def enabled(self) -> bool:
+        """Whether zone mode is configured at all."""
+        return self.led_count > 0
+
+
+@dataclass(frozen=True)
+class ZoneMap:
+    """Zone label for every sampled pixel of a frame geometry."""
+
+    row_stride: int
+    col_stride: int
+    labels: np.ndarray
+    """Flat ``label * 3 + channel`` bins, one per sampled pixel channel."""
+    counts: np.ndarray
+    """Number of sampled pixels in each zone."""
+
+
+def _edge_zones(position: np.ndarray, length: int, count: int) -> np.ndarray:
+    """Split positions along an edge into ``count`` equal zones."""
+    return np.minimum(position * count // max(length, 1), count - 1)
+
+
+@functools.lru_cache(maxsize=16)
+def get_zone_map(height: int, width: int, colour_precision: int, layout: ZoneLayout) -> ZoneMap:
+    """Label the sampled pixels of a frame geometry with their LED zones, cached per geometry."""
+    row_stride, col_stride = get_strides(colour_precision)
+    ys = np.arange(0, height, row_stride, dtype=np.intp)[:, None]
+    xs = np.arange(0, width, col_stride, dtype=np.intp)[None, :]
+    band_height = max(1, height * layout.depth // 100)
+    band_width = max(1, width * layout.depth // 100)
+
+    # Pixels outside every band go into a discarded bin past the last LED
+    discard = layout.led_count
+    labels = np.full((ys.size, xs.size), discard, dtype=np.intp)
+
+    offset = 0
+    if layout.left:
+        zones = layout.left - 1 - _edge_zones(ys, height, layout.left)
+        labels = np.where(xs < band_width, offset + zones, labels)
+    offset += layout.left
+    if layout.right:
+        zones = _edge_zones(ys, height, layout.right)
+        labels = np.where(xs >= width - band_width, offset + layout.top + zones, labels)
+    # Corners belong to the top and bottom edges
+    if layout.top:
+        zones = _edge_zones(xs, width, layout.top)
+        labels = np.where(ys < band_height, offset + zones, labels)
+    offset += layout.top + layout.right
+    if layout.bottom:
+        zones = layout.bottom - 1 - _edge_zones(xs, width, layout.bottom)
+        labels = np.where(ys >= height - band_height, offset + zones, labels)
+
+    labels = labels.ravel()
+    counts = np.bincount(labels, minlength=discard + 1)[:discard]
+    channel_labels = (labels[:, None] * _COLOUR_CHANNELS + np.arange(_COLOUR_CHANNELS)).ravel()
+    channel_labels.setflags(write=False)
+    counts.setflags(write=False)
+    return ZoneMap(row_stride, col_stride, channel_labels, counts)
+
+
+def reduce_zones(frame: np.ndarray, colour_precision: int, layout: ZoneLayout) -> np.ndarray:
+    """Average the edge zones of a BGRA frame into an ``(N, 3)`` RGB array, one row per LED."""
+    height, width = frame.shape[:2]
+    zone_map = get_zone_map(height, width, colour_precision, layout)
+    sampled = frame[::zone_map.row_stride, ::zone_map.col_stride, :_COLOUR_CHANNELS]
+
+    # One bincount sums every channel of every zone at once
+    sums = np.bincount(
+        zone_map.labels,
+        weights=sampled.ravel(),
+        minlength=(layout.led_count + 1) * _COLOUR_CHANNELS,
+    ).reshape(-1, _COLOUR_CHANNELS)[:layout.led_count]
+
+    means = sums / np.maximum(zone_map.counts, 1)[:, None]
+    # Reorder the reduced BGR values to RGB
+    return np.rint(means[:, ::-1]).astype(np.uint8)